@@ -1,3 +1,4 @@
+import atexit
 from threading import Thread
 from sqlalchemy import text
 
@@ -7,41 +8,128 @@ from CTFd.plugins import (
     register_plugin_script,
 )
 
-from .routes import admin_bp, pod_bp, schedule_cleanup_loop
+from .admission import admission
+from .backends import placement
+from .config_cache import config_cache
+from .leader import leader_elector
+from .routes import (
+    admin_bp,
+    pod_bp,
+    run_expiry_scheduler,
+    run_informer,
+    schedule_cleanup_loop,
+    schedule_idle_loop,
+    schedule_reconcile_loop,
+    schedule_warm_pool_loop,
+    stop_background_loops,
+)
+from .workers import spawn_pool
 
 
 def _ensure_schema(engine):
     # Minimal safety migrations for new columns without Alembic.
     stmts = [
-        ("route_name", "VARCHAR(128)"),
-        ("hostname", "VARCHAR(256)"),
+        ("k8s_instances", "route_name", "VARCHAR(128)"),
+        ("k8s_instances", "hostname", "VARCHAR(256)"),
+        ("k8s_challenge_configs", "warm_pool_size", "INTEGER NOT NULL DEFAULT 0"),
+        ("k8s_challenge_configs", "max_instances", "INTEGER NOT NULL DEFAULT 0"),
+        ("k8s_challenge_configs", "ownership", "VARCHAR(8) NOT NULL DEFAULT 'user'"),
+        ("k8s_instances", "team_id", "INTEGER"),
+        ("k8s_instances", "owner_scope", "VARCHAR(8) NOT NULL DEFAULT 'user'"),
+        ("k8s_instances", "last_seen_at", "TIMESTAMP NULL"),
+        ("k8s_instances", "backend", "VARCHAR(64)"),
+        ("k8s_instances", "woken_at", "TIMESTAMP NULL"),
     ]
     dialect = engine.dialect.name
     with engine.begin() as conn:
-        for col, coltype in stmts:
+        for table, col, coltype in stmts:
             try:
                 exists = None
                 if dialect == "sqlite":
                     exists_rows = conn.execute(
-                        text("PRAGMA table_info('k8s_instances')")
+                        text(f"PRAGMA table_info('{table}')")
                     ).fetchall()
                     exists = any(r[1] == col for r in exists_rows)
                 else:
                     exists_row = conn.execute(
                         text(
                             "SELECT 1 FROM information_schema.COLUMNS "
-                            "WHERE TABLE_NAME = 'k8s_instances' AND COLUMN_NAME = :col"
+                            "WHERE TABLE_NAME = :table AND COLUMN_NAME = :col"
                         ),
-                        {"col": col},
+                        {"table": table, "col": col},
                     ).first()
                     exists = bool(exists_row)
                 if not exists:
-                    conn.execute(text(f"ALTER TABLE k8s_instances ADD COLUMN {col} {coltype}"))
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {col} {coltype}"))
             except Exception:
                 # Don't break plugin load if schema check fails.
                 pass
 
 
+def _ensure_indexes(engine):
+    # Indexes declared on the models are only created with new tables.
+    indexes = [
+        (
+            "idx_k8s_instances_user_challenge_created",
+            "k8s_instances",
+            "user_id, challenge_id, created_at DESC",
+        ),
+        (
+            "idx_k8s_instances_team_challenge_created",
+            "k8s_instances",
+            "team_id, challenge_id, created_at DESC",
+        ),
+        (
+            "idx_k8s_instances_challenge_created",
+            "k8s_instances",
+            "challenge_id, created_at DESC",
+        ),
+        (
+            "idx_k8s_instances_status_created",
+            "k8s_instances",
+            "status, created_at DESC",
+        ),
+    ]
+    # Old index -> the index that covers it; dropped once the latter exists.
+    replaced = {
+        "idx_k8s_instances_user_challenge": "idx_k8s_instances_user_challenge_created",
+    }
+    dialect = engine.dialect.name
+    ensured = set()
+    with engine.begin() as conn:
+
+        def mysql_index_exists(name, table):
+            return conn.execute(
+                text(
+                    "SELECT 1 FROM information_schema.STATISTICS "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table "
+                    "AND INDEX_NAME = :name"
+                ),
+                {"table": table, "name": name},
+            ).first()
+
+        for name, table, columns in indexes:
+            try:
+                if dialect in {"sqlite", "postgresql"}:
+                    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+                elif not mysql_index_exists(name, table):
+                    conn.execute(text(f"CREATE INDEX {name} ON {table} ({columns})"))
+                ensured.add(name)
+            except Exception:
+                # Don't break plugin load if the index can't be created.
+                pass
+        for name, replacement in replaced.items():
+            if replacement not in ensured:
+                continue
+            try:
+                if dialect in {"sqlite", "postgresql"}:
+                    conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+                elif mysql_index_exists(name, "k8s_instances"):
+                    conn.execute(text(f"DROP INDEX {name} ON k8s_instances"))
+            except Exception:
+                pass
+
+
 def load(app):
     register_plugin_assets_directory(app, base_path="/plugins/podspawner/assets")
     register_plugin_script("/plugins/podspawner/assets/podspawner.js")
@@ -49,10 +137,64 @@ def load(app):
     app.register_blueprint(pod_bp)
     app.register_blueprint(admin_bp)
 
+    admission.configure(
+        cpu_budget=app.config.get("PODSPAWNER_CLUSTER_CPU"),
+        memory_budget=app.config.get("PODSPAWNER_CLUSTER_MEMORY"),
+        per_user=app.config.get("PODSPAWNER_MAX_INSTANCES_PER_USER"),
+        per_team=app.config.get("PODSPAWNER_MAX_INSTANCES_PER_TEAM"),
+        resync_interval=app.config.get("PODSPAWNER_ADMISSION_RESYNC", 5),
+    )
+    placement.configure(app.config.get("PODSPAWNER_BACKENDS"))
+    config_cache.check_interval = float(app.config.get("PODSPAWNER_CONFIG_CACHE_TTL", 5))
+    spawn_pool.configure(
+        workers=app.config.get("PODSPAWNER_SPAWN_WORKERS", 4),
+        max_queue=app.config.get("PODSPAWNER_SPAWN_QUEUE_SIZE", 100),
+    )
+
     with app.app_context():
         _ensure_schema(db.engine)
         db.create_all()
+        _ensure_indexes(db.engine)
+
+    # Cleanup and warm pool loops only do work in the process holding the lease
+    cleanup_interval = int(app.config.get("PODSPAWNER_CLEANUP_INTERVAL", 600))
+    leader_elector.lease_name = app.config.get("PODSPAWNER_LEASE_NAME", "ctfd-podspawner")
+    leader_elector.lease_duration = int(app.config.get("PODSPAWNER_LEASE_DURATION", 180))
+    atexit.register(stop_background_loops, app)
 
-    # Start background cleanup thread
-    thread = Thread(target=schedule_cleanup_loop, args=(app,), daemon=True)
+    # Tear instances down at their expiry second
+    expiry_thread = Thread(target=run_expiry_scheduler, args=(app,), daemon=True)
+    expiry_thread.start()
+
+    # Start background cleanup thread (safety-net sweep behind the scheduler)
+    thread = Thread(target=schedule_cleanup_loop, args=(app, cleanup_interval), daemon=True)
     thread.start()
+
+    # Start the Deployment informer that backs /status lookups
+    if app.config.get("PODSPAWNER_INFORMER_ENABLED", True):
+        informer_thread = Thread(target=run_informer, args=(app,), daemon=True)
+        informer_thread.start()
+
+    # Keep warm pools of pre-started Deployments topped up
+    warm_pool_thread = Thread(
+        target=schedule_warm_pool_loop,
+        args=(app, int(app.config.get("PODSPAWNER_WARM_POOL_INTERVAL", 15))),
+        daemon=True,
+    )
+    warm_pool_thread.start()
+
+    # Scale idle instances to zero until their owner comes back
+    idle_thread = Thread(
+        target=schedule_idle_loop,
+        args=(app, int(app.config.get("PODSPAWNER_IDLE_INTERVAL", 60))),
+        daemon=True,
+    )
+    idle_thread.start()
+
+    # Periodically diff cluster objects against k8s_instances
+    reconcile_thread = Thread(
+        target=schedule_reconcile_loop,
+        args=(app, int(app.config.get("PODSPAWNER_RECONCILE_INTERVAL", 300))),
+        daemon=True,
+    )
+    reconcile_thread.start()
@@ -0,0 +1,149 @@
+import re
+import threading
+import time
+from collections import Counter
+
+_QUANTITY_RE = re.compile(r"^([0-9]+(?:\.[0-9]+)?)([a-zA-Z]*)$")
+
+_MEMORY_SUFFIXES = {
+    "": 1,
+    "k": 10**3,
+    "M": 10**6,
+    "G": 10**9,
+    "T": 10**12,
+    "Ki": 2**10,
+    "Mi": 2**20,
+    "Gi": 2**30,
+    "Ti": 2**40,
+}
+
+
+def parse_cpu(value):
+    """
+    Kubernetes CPU quantity ("250m", "0.5", "2") in millicores.
+    """
+    match = _QUANTITY_RE.match(str(value or "").strip())
+    if not match or match.group(2) not in {"", "m"}:
+        raise ValueError(f"Invalid CPU quantity: {value}")
+    number = float(match.group(1))
+    return int(number if match.group(2) == "m" else number * 1000)
+
+
+def parse_memory(value):
+    """
+    Kubernetes memory quantity ("128Mi", "1G", "512000") in bytes.
+    """
+    match = _QUANTITY_RE.match(str(value or "").strip())
+    if not match or match.group(2) not in _MEMORY_SUFFIXES:
+        raise ValueError(f"Invalid memory quantity: {value}")
+    return int(float(match.group(1)) * _MEMORY_SUFFIXES[match.group(2)])
+
+
+class AdmissionController:
+    """
+    Capacity counters for active instances: a global CPU/memory budget and
+    per-user, per-team and per-challenge instance counts.
+
+    Counters are updated incrementally on admit/release and rebuilt from the
+    database every ``resync_interval`` seconds, which bounds the drift between
+    processes that each keep their own copy.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.cpu_budget = None
+        self.memory_budget = None
+        self.per_user = None
+        self.per_team = None
+        self.resync_interval = 5
+        self._synced_at = 0.0
+        self._reset()
+
+    def _reset(self):
+        self.cpu_used = 0
+        self.memory_used = 0
+        self.by_user = Counter()
+        self.by_team = Counter()
+        self.by_challenge = Counter()
+
+    def configure(self, cpu_budget=None, memory_budget=None, per_user=None, per_team=None, resync_interval=None):
+        self.cpu_budget = parse_cpu(cpu_budget) if cpu_budget else None
+        self.memory_budget = parse_memory(memory_budget) if memory_budget else None
+        self.per_user = int(per_user) if per_user else None
+        self.per_team = int(per_team) if per_team else None
+        if resync_interval:
+            self.resync_interval = float(resync_interval)
+
+    def needs_resync(self):
+        return time.monotonic() - self._synced_at >= self.resync_interval
+
+    def invalidate(self):
+        self._synced_at = 0.0
+
+    def load(self, usage, reserved=(0, 0)):
+        """
+        Replace the counters. ``usage`` yields
+        (challenge_id, user_id, team_id, count, (cpu_m, memory_bytes)) per group;
+        ``reserved`` is capacity held outside instances, e.g. warm pools.
+        """
+        with self._lock:
+            self._reset()
+            self.cpu_used, self.memory_used = reserved
+            for challenge_id, user_id, team_id, count, (cpu_m, memory) in usage:
+                self.by_challenge[challenge_id] += count
+                self.by_user[user_id] += count
+                if team_id is not None:
+                    self.by_team[team_id] += count
+                self.cpu_used += cpu_m * count
+                self.memory_used += memory * count
+            self._synced_at = time.monotonic()
+
+    def try_admit(self, challenge_id, user_id, team_id, cost, challenge_cap=None):
+        """
+        Reserve capacity for one instance.
+        Returns None when admitted, otherwise (http_status, message).
+        """
+        cpu_m, memory = cost
+        with self._lock:
+            if self.per_user and self.by_user[user_id] >= self.per_user:
+                return 429, "Active instance limit reached for this user"
+            if team_id is not None and self.per_team and self.by_team[team_id] >= self.per_team:
+                return 429, "Active instance limit reached for this team"
+            if challenge_cap and self.by_challenge[challenge_id] >= challenge_cap:
+                return 503, "No capacity left for this challenge, retry later"
+            if self.cpu_budget is not None and self.cpu_used + cpu_m > self.cpu_budget:
+                return 503, "Cluster at capacity, retry later"
+            if self.memory_budget is not None and self.memory_used + memory > self.memory_budget:
+                return 503, "Cluster at capacity, retry later"
+            self.by_challenge[challenge_id] += 1
+            self.by_user[user_id] += 1
+            if team_id is not None:
+                self.by_team[team_id] += 1
+            self.cpu_used += cpu_m
+            self.memory_used += memory
+            return None
+
+    def release(self, challenge_id, user_id, team_id, cost):
+        cpu_m, memory = cost
+        with self._lock:
+            if self.by_challenge[challenge_id] > 0:
+                self.by_challenge[challenge_id] -= 1
+            if self.by_user[user_id] > 0:
+                self.by_user[user_id] -= 1
+            if team_id is not None and self.by_team[team_id] > 0:
+                self.by_team[team_id] -= 1
+            self.cpu_used = max(0, self.cpu_used - cpu_m)
+            self.memory_used = max(0, self.memory_used - memory)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "cpu_used_millicores": self.cpu_used,
+                "cpu_budget_millicores": self.cpu_budget,
+                "memory_used_bytes": self.memory_used,
+                "memory_budget_bytes": self.memory_budget,
+                "active_instances": sum(self.by_challenge.values()),
+            }
+
+
+admission = AdmissionController()
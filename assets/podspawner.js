@@ -1,17 +1,23 @@
 (() => {
   const POLL_INTERVAL_MS = 4000;
+  // Polling slows down to this while nothing is pending or changing.
+  const MAX_POLL_INTERVAL_MS = 60000;
+  // Only used where MutationObserver is missing.
   const DETECT_INTERVAL_MS = 500;
+  const COUNTDOWN_INTERVAL_MS = 1000;
 
-  let currentChallengeId = null;
-  let container = null;
-  let statusLine = null;
-  let endpointLine = null;
-  let expiresLine = null;
-  let spawnBtn = null;
-  let stopBtn = null;
+  const widgets = new Set();
+  let modalWidget = null;
   let pollTimer = null;
+  let pollDelay = POLL_INTERVAL_MS;
+  let pollGeneration = 0;
+  let lastPollState = null;
+  let countdownTimer = null;
+  let eventSource = null;
+  let transportKey = null;
+  let needsRefresh = false;
   let detectTimer = null;
-  let expiresAt = null;
+  let detectScheduled = false;
   const basePath = (() => {
     const root = (window.CTFd && window.CTFd.config && window.CTFd.config.urlRoot) || "";
     return root.endsWith("/") ? root.slice(0, -1) : root;
@@ -81,27 +87,43 @@
     );
   }
 
-  function teardown() {
+  function challengeIds() {
+    return Array.from(new Set(Array.from(widgets, (w) => w.challengeId))).sort((a, b) => a - b);
+  }
+
+  function stopTransport() {
     if (pollTimer) {
-      window.clearInterval(pollTimer);
+      window.clearTimeout(pollTimer);
       pollTimer = null;
+      pollGeneration += 1;
+    }
+    if (eventSource) {
+      eventSource.close();
+      eventSource = null;
+    }
+    transportKey = null;
+  }
+
+  function removeWidget(widget) {
+    widgets.delete(widget);
+    if (widget.container && widget.container.parentNode) {
+      widget.container.parentNode.removeChild(widget.container);
     }
-    expiresAt = null;
-    if (container && container.parentNode) {
-      container.parentNode.removeChild(container);
+    if (widget === modalWidget) modalWidget = null;
+    if (!widgets.size && countdownTimer) {
+      window.clearInterval(countdownTimer);
+      countdownTimer = null;
     }
-    container = null;
-    statusLine = null;
-    endpointLine = null;
-    expiresLine = null;
-    spawnBtn = null;
-    stopBtn = null;
-    currentChallengeId = null;
   }
 
-  function createContainer(target) {
-    container = document.createElement("div");
-    container.id = "k8s-spawn-widget";
+  function teardown() {
+    if (modalWidget) removeWidget(modalWidget);
+  }
+
+  function createWidget(challengeId, target, embedded) {
+    const container = document.createElement("div");
+    if (!embedded) container.id = "k8s-spawn-widget";
+    container.className = "k8s-spawn-widget";
     container.style.border = "1px solid #e5e5e5";
     container.style.padding = "12px";
     container.style.marginTop = "12px";
@@ -112,18 +134,18 @@
     title.style.fontWeight = "bold";
     title.style.marginBottom = "6px";
 
-    statusLine = document.createElement("div");
-    endpointLine = document.createElement("div");
+    const statusLine = document.createElement("div");
+    const endpointLine = document.createElement("div");
     endpointLine.style.wordBreak = "break-all";
-    expiresLine = document.createElement("div");
+    const expiresLine = document.createElement("div");
 
     const buttons = document.createElement("div");
     buttons.style.marginTop = "8px";
-    spawnBtn = document.createElement("button");
+    const spawnBtn = document.createElement("button");
     spawnBtn.textContent = "Déployer";
     spawnBtn.className = "btn btn-primary btn-sm";
 
-    stopBtn = document.createElement("button");
+    const stopBtn = document.createElement("button");
     stopBtn.textContent = "Arrêter";
     stopBtn.className = "btn btn-outline-danger btn-sm";
     stopBtn.style.marginLeft = "6px";
@@ -138,43 +160,71 @@
 
     target.appendChild(container);
 
+    const widget = {
+      challengeId,
+      embedded,
+      container,
+      statusLine,
+      endpointLine,
+      expiresLine,
+      spawnBtn,
+      stopBtn,
+      expiresAt: null,
+    };
     spawnBtn.addEventListener("click", (e) => {
       e.preventDefault();
-      spawn();
+      spawn(widget);
     });
     stopBtn.addEventListener("click", (e) => {
       e.preventDefault();
-      stop();
+      stop(widget);
     });
+    widgets.add(widget);
+    needsRefresh = true;
+    return widget;
   }
 
-  function setLoading(isLoading) {
-    if (spawnBtn) spawnBtn.disabled = isLoading;
-    if (stopBtn) stopBtn.disabled = isLoading;
+  function setLoading(widget, isLoading) {
+    widget.spawnBtn.disabled = isLoading;
+    widget.stopBtn.disabled = isLoading;
   }
 
-  function updateView(instance) {
+  function renderCountdown(widget) {
+    const delta = Math.max(0, widget.expiresAt.getTime() - Date.now());
+    const mins = Math.floor(delta / 60000);
+    const secs = Math.floor((delta % 60000) / 1000);
+    widget.expiresLine.textContent = `Expiration dans ${mins}m ${secs}s`;
+  }
+
+  function updateView(widget, instance) {
     if (!instance) {
-      statusLine.textContent = "Aucune instance en cours.";
-      endpointLine.textContent = "";
-      expiresLine.textContent = "";
+      widget.statusLine.textContent = "Aucune instance en cours.";
+      widget.endpointLine.textContent = "";
+      widget.expiresLine.textContent = "";
+      widget.expiresAt = null;
       return;
     }
-    statusLine.textContent = `Statut : ${instance.status}`;
-    endpointLine.textContent = instance.endpoint
+    widget.statusLine.textContent =
+      instance.status === "SUSPENDED"
+        ? "Statut : SUSPENDED (en veille, relancée à votre retour)"
+        : `Statut : ${instance.status}`;
+    widget.endpointLine.textContent = instance.endpoint
       ? `Endpoint : ${instance.endpoint}`
       : "Endpoint : n/a";
-    expiresAt = instance.expires_at ? new Date(instance.expires_at) : null;
-    if (expiresAt) {
-      const delta = Math.max(0, expiresAt.getTime() - Date.now());
-      const mins = Math.floor(delta / 60000);
-      const secs = Math.floor((delta % 60000) / 1000);
-      expiresLine.textContent = `Expiration dans ${mins}m ${secs}s`;
+    widget.expiresAt = instance.expires_at ? new Date(instance.expires_at) : null;
+    if (widget.expiresAt) {
+      renderCountdown(widget);
     } else {
-      expiresLine.textContent = "";
+      widget.expiresLine.textContent = "";
     }
   }
 
+  function updateChallenge(challengeId, instance) {
+    widgets.forEach((widget) => {
+      if (widget.challengeId === challengeId) updateView(widget, instance);
+    });
+  }
+
   async function api(path, opts) {
     const url = `${basePath}/plugins/podspawner/${path}`;
     const headers = { "Content-Type": "application/json" };
@@ -192,67 +242,175 @@
     return data;
   }
 
+  function isQuiet(instances) {
+    // Nothing pending and nothing changed since the previous poll.
+    const state = JSON.stringify(instances);
+    const quiet = state === lastPollState && instances.every((inst) => !inst || inst.status !== "PENDING");
+    lastPollState = state;
+    return quiet;
+  }
+
+  // The status endpoints send ETags: the browser revalidates each fetch and an
+  // unchanged instance comes back as a 304 served from its cache.
   async function refreshStatus() {
-    if (!currentChallengeId) return;
+    const ids = challengeIds();
+    if (!ids.length) return true;
+    if (ids.length === 1) {
+      let instance = null;
+      try {
+        const data = await api(`status/${ids[0]}`, { method: "GET" });
+        instance = data.instance;
+      } catch (err) {
+        instance = null;
+      }
+      updateChallenge(ids[0], instance);
+      return isQuiet([instance]);
+    }
     try {
-      const data = await api(`status/${currentChallengeId}`, { method: "GET" });
-      updateView(data.instance);
+      const data = await api(`status?ids=${ids.join(",")}`, { method: "GET" });
+      const instances = ids.map((id) => (data.instances || {})[id] || null);
+      ids.forEach((id, idx) => updateChallenge(id, instances[idx]));
+      return isQuiet(instances);
     } catch (err) {
-      updateView(null);
+      // Keep the last known state and keep backing off; the next tick retries.
+      return true;
     }
   }
 
-  async function spawn() {
-    if (!currentChallengeId) return;
-    setLoading(true);
+  async function spawn(widget) {
+    setLoading(widget, true);
     try {
-      const data = await api(`spawn/${currentChallengeId}`, { method: "POST" });
-      updateView(data.instance);
+      const data = await api(`spawn/${widget.challengeId}`, { method: "POST" });
+      updateChallenge(widget.challengeId, data.instance);
     } catch (err) {
       alert(`Impossible de déployer : ${err.message}`);
     } finally {
-      setLoading(false);
+      setLoading(widget, false);
+      restartTransport();
     }
   }
 
-  async function stop() {
-    if (!currentChallengeId) return;
-    setLoading(true);
+  async function stop(widget) {
+    setLoading(widget, true);
     try {
-      const data = await api(`stop/${currentChallengeId}`, { method: "POST" });
-      updateView(data.instance);
+      const data = await api(`stop/${widget.challengeId}`, { method: "POST" });
+      updateChallenge(widget.challengeId, data.instance);
     } catch (err) {
       alert(`Arrêt impossible : ${err.message}`);
     } finally {
-      setLoading(false);
+      setLoading(widget, false);
+      restartTransport();
     }
   }
 
   function tickCountdown() {
-    if (expiresAt) {
-      const delta = expiresAt.getTime() - Date.now();
-      if (delta <= 0) {
-        expiresLine.textContent = "Expirée";
-        expiresAt = null;
+    widgets.forEach((widget) => {
+      if (!widget.expiresAt) return;
+      if (widget.expiresAt.getTime() - Date.now() <= 0) {
+        widget.expiresLine.textContent = "Expirée";
+        widget.expiresAt = null;
       } else {
-        const mins = Math.floor(delta / 60000);
-        const secs = Math.floor((delta % 60000) / 1000);
-        expiresLine.textContent = `Expiration dans ${mins}m ${secs}s`;
+        renderCountdown(widget);
       }
+    });
+  }
+
+  function startPolling() {
+    if (pollTimer) return;
+    const generation = pollGeneration;
+    pollDelay = POLL_INTERVAL_MS;
+    const tick = async () => {
+      const quiet = await refreshStatus();
+      if (generation !== pollGeneration) return;
+      pollDelay = quiet ? Math.min(pollDelay * 2, MAX_POLL_INTERVAL_MS) : POLL_INTERVAL_MS;
+      pollTimer = window.setTimeout(tick, pollDelay);
+    };
+    pollTimer = window.setTimeout(tick, 0);
+  }
+
+  function restartTransport() {
+    // A player action: reopen the stream on the new instance, or go back to
+    // the fast polling interval.
+    stopTransport();
+    syncTransport();
+  }
+
+  function startEvents(challengeId) {
+    if (typeof window.EventSource !== "function") {
+      startPolling();
+      return;
+    }
+    let opened = false;
+    const source = new EventSource(`${basePath}/plugins/podspawner/events/${challengeId}`);
+    eventSource = source;
+    source.onopen = () => {
+      opened = true;
+    };
+    source.onmessage = (ev) => {
+      if (source !== eventSource) return;
+      let data = {};
+      try {
+        data = JSON.parse(ev.data);
+      } catch (err) {
+        return;
+      }
+      updateChallenge(challengeId, data.success === false ? null : data.instance);
+    };
+    source.onerror = () => {
+      // The browser reconnects on its own once a stream has been established;
+      // if it never connected, fall back to polling.
+      if (opened || source !== eventSource) return;
+      source.close();
+      eventSource = null;
+      startPolling();
+    };
+  }
+
+  function syncTransport() {
+    // One widget gets a push stream; several share the batched status endpoint
+    // instead of holding one stream each. Nothing runs while the tab is hidden.
+    if (document.hidden) return;
+    const ids = challengeIds();
+    const key = ids.join(",");
+    if (key === transportKey) {
+      // A new widget for an already tracked challenge needs the current state.
+      if (needsRefresh && ids.length) refreshStatus();
+      needsRefresh = false;
+      return;
+    }
+    needsRefresh = false;
+    stopTransport();
+    transportKey = key;
+    if (ids.length === 1) {
+      startEvents(ids[0]);
+    } else if (ids.length > 1) {
+      startPolling();
+    }
+    if (ids.length && !countdownTimer) {
+      countdownTimer = window.setInterval(tickCountdown, COUNTDOWN_INTERVAL_MS);
     }
   }
 
   function mountFor(challengeId, target) {
     if (!challengeId || !target) return;
-    if (challengeId === currentChallengeId && container) return;
+    if (modalWidget && modalWidget.challengeId === challengeId) return;
     teardown();
-    currentChallengeId = challengeId;
-    createContainer(target);
-    refreshStatus();
-    pollTimer = window.setInterval(() => {
-      refreshStatus();
-      tickCountdown();
-    }, POLL_INTERVAL_MS);
+    modalWidget = createWidget(challengeId, target, false);
+  }
+
+  function mountEmbedded(root = document) {
+    // Themes and challenge descriptions can place widgets explicitly with
+    // <div data-podspawner-challenge="ID"></div>.
+    widgets.forEach((widget) => {
+      if (widget.embedded && !document.body.contains(widget.container)) removeWidget(widget);
+    });
+    root.querySelectorAll("[data-podspawner-challenge]").forEach((el) => {
+      if (el.dataset.podspawnerMounted) return;
+      const challengeId = parseIntSafe(el.dataset.podspawnerChallenge);
+      if (!challengeId) return;
+      el.dataset.podspawnerMounted = "1";
+      createWidget(challengeId, el, true);
+    });
   }
 
   function detectAndMount(root = document) {
@@ -260,16 +418,56 @@
     const target = findTarget(root);
     if (challengeId && target) {
       mountFor(challengeId, target);
-    } else if (!challengeId && container) {
+    } else if (!challengeId && modalWidget) {
       teardown();
     }
+    mountEmbedded(root);
+    syncTransport();
+  }
+
+  function isOwnMutation(record) {
+    const node = record.target;
+    return node.nodeType === 1 && node.closest(".k8s-spawn-widget") !== null;
+  }
+
+  function scheduleDetect() {
+    // Coalesce a burst of DOM changes (a modal being filled) into one pass.
+    if (detectScheduled) return;
+    detectScheduled = true;
+    window.requestAnimationFrame(() => {
+      detectScheduled = false;
+      detectAndMount();
+    });
   }
 
   function setupDetectors() {
     detectAndMount();
-    detectTimer = window.setInterval(detectAndMount, DETECT_INTERVAL_MS);
+    if (typeof window.MutationObserver === "function") {
+      const observer = new MutationObserver((records) => {
+        // Widget text updates (countdown, status) don't need a new scan.
+        if (records.every(isOwnMutation)) return;
+        scheduleDetect();
+      });
+      observer.observe(document.body, {
+        childList: true,
+        subtree: true,
+        attributes: true,
+        attributeFilter: ["data-challenge-id", "data-podspawner-challenge"],
+      });
+    } else {
+      detectTimer = window.setInterval(detectAndMount, DETECT_INTERVAL_MS);
+    }
+
+    document.addEventListener("visibilitychange", () => {
+      if (document.hidden) {
+        stopTransport();
+      } else {
+        lastPollState = null;
+        syncTransport();
+      }
+    });
 
-    window.addEventListener("hashchange", detectAndMount);
+    window.addEventListener("hashchange", () => detectAndMount());
     document.addEventListener("shown.bs.modal", (ev) => {
       const modal = ev.target;
       if (!modal.matches("#challenge-window, #challenge-modal")) return;
@@ -0,0 +1,185 @@
+import json
+import threading
+from collections import Counter, namedtuple
+
+from sqlalchemy import and_, or_
+
+from .admission import parse_cpu, parse_memory
+
+DEFAULT_BACKEND = "default"
+
+# PODSPAWNER_BACKENDS option -> K8sClient argument; unset ones come from the
+# top-level PODSPAWNER_* settings.
+_CLIENT_OPTIONS = {
+    "api_host": "host",
+    "namespace": "namespace",
+    "token_path": "token_path",
+    "ca_path": "ca_path",
+    "timeout": "timeout",
+    "pool_size": "pool_size",
+}
+
+Backend = namedtuple(
+    "Backend",
+    "name client_options gateway_name gateway_namespace base_domain enabled "
+    "max_instances cpu_budget memory_budget",
+)
+
+
+def parse_backends(raw):
+    """
+    Backends from PODSPAWNER_BACKENDS, a dict (or its JSON text) of name to
+    options. The top-level settings always make up the "default" backend; an
+    entry with that name only overrides them.
+    """
+    if isinstance(raw, str):
+        raw = json.loads(raw) if raw.strip() else {}
+    raw = dict(raw or {})
+    raw.setdefault(DEFAULT_BACKEND, {})
+    backends = {}
+    for name, options in raw.items():
+        options = options or {}
+        if not name or len(name) > 64:
+            raise ValueError(f"Invalid backend name: {name!r}")
+        backends[name] = Backend(
+            name=name,
+            client_options={
+                arg: options[option] for option, arg in _CLIENT_OPTIONS.items() if option in options
+            },
+            gateway_name=options.get("gateway_name"),
+            gateway_namespace=options.get("gateway_namespace"),
+            base_domain=options.get("base_domain"),
+            enabled=bool(options.get("enabled", True)),
+            max_instances=int(options.get("max_instances") or 0) or None,
+            cpu_budget=parse_cpu(options["cpu"]) if options.get("cpu") else None,
+            memory_budget=parse_memory(options["memory"]) if options.get("memory") else None,
+        )
+    return backends
+
+
+def backend_filter(column, name):
+    """
+    SQL criterion for rows placed on backend ``name``; rows from before
+    backends existed have no backend and belong to the default one.
+    """
+    if name == DEFAULT_BACKEND:
+        return or_(column == name, column.is_(None))
+    return column == name
+
+
+def backend_exclude(column, names):
+    """
+    SQL criterion for rows placed on none of the backends ``names``.
+    """
+    names = list(names)
+    if DEFAULT_BACKEND in names:
+        return and_(column.isnot(None), column.notin_(names))
+    return or_(column.is_(None), column.notin_(names))
+
+
+class BackendPlacement:
+    """
+    Active-instance and capacity counters per backend, used to pick where a
+    new instance goes. The counters are rebuilt together with the admission
+    counters and adjusted in between on choose/release.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.backends = parse_backends(None)
+        self._reset()
+
+    def _reset(self):
+        self.instances = Counter()
+        self.cpu_used = Counter()
+        self.memory_used = Counter()
+
+    def configure(self, raw):
+        self.backends = parse_backends(raw)
+
+    def get(self, name):
+        return self.backends.get(name or DEFAULT_BACKEND) or self.backends[DEFAULT_BACKEND]
+
+    def load(self, usage, reserved=(0, 0)):
+        """
+        Replace the counters; ``usage`` yields (backend, count, (cpu_m, memory_bytes)).
+        ``reserved`` is capacity held on the default backend outside instances.
+        """
+        with self._lock:
+            self._reset()
+            self.cpu_used[DEFAULT_BACKEND], self.memory_used[DEFAULT_BACKEND] = reserved
+            for name, count, (cpu_m, memory) in usage:
+                name = name or DEFAULT_BACKEND
+                self.instances[name] += count
+                self.cpu_used[name] += cpu_m * count
+                self.memory_used[name] += memory * count
+
+    def _utilization(self, backend, cost):
+        """
+        Highest fill ratio of the backend's limits once ``cost`` is added, or
+        None when it doesn't fit. Backends without limits count as empty.
+        """
+        cpu_m, memory = cost
+        ratios = [0.0]
+        for used, limit in (
+            (self.instances[backend.name] + 1, backend.max_instances),
+            (self.cpu_used[backend.name] + cpu_m, backend.cpu_budget),
+            (self.memory_used[backend.name] + memory, backend.memory_budget),
+        ):
+            if limit is None:
+                continue
+            if used > limit:
+                return None
+            ratios.append(used / limit)
+        return max(ratios)
+
+    def choose(self, cost, exclude=()):
+        """
+        Reserve ``cost`` on the least utilized enabled backend, ties going to
+        the one with fewer active instances. Returns its name, or None when no
+        backend has room.
+        """
+        with self._lock:
+            best = None
+            for backend in self.backends.values():
+                if not backend.enabled or backend.name in exclude:
+                    continue
+                utilization = self._utilization(backend, cost)
+                if utilization is None:
+                    continue
+                score = (utilization, self.instances[backend.name], backend.name)
+                if best is None or score < best[0]:
+                    best = (score, backend.name)
+            if best is None:
+                return None
+            name = best[1]
+            self.instances[name] += 1
+            self.cpu_used[name] += cost[0]
+            self.memory_used[name] += cost[1]
+            return name
+
+    def release(self, name, cost):
+        name = name or DEFAULT_BACKEND
+        with self._lock:
+            if self.instances[name] > 0:
+                self.instances[name] -= 1
+            self.cpu_used[name] = max(0, self.cpu_used[name] - cost[0])
+            self.memory_used[name] = max(0, self.memory_used[name] - cost[1])
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: {
+                    "enabled": backend.enabled,
+                    "active_instances": self.instances[name],
+                    "max_instances": backend.max_instances,
+                    "cpu_used_millicores": self.cpu_used[name],
+                    "cpu_budget_millicores": backend.cpu_budget,
+                    "memory_used_bytes": self.memory_used[name],
+                    "memory_budget_bytes": backend.memory_budget,
+                }
+                for name, backend in self.backends.items()
+            }
+
+
+placement = BackendPlacement()
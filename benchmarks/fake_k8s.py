@@ -0,0 +1,402 @@
+"""
+Local TLS stand-in for the parts of the Kubernetes API that K8sClient uses:
+Deployments, Services, HTTPRoutes and Leases, including label selectors,
+deletecollection, merge/apply patches and watches.
+
+Every request is delayed by ``latency`` seconds and Deployments report an
+available replica ``ready_delay`` seconds after creation.
+
+    python benchmarks/fake_k8s.py --port 8443 --latency 0.02 --ready-delay 3
+"""
+import argparse
+import copy
+import json
+import os
+import re
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+_PATH_RE = re.compile(
+    r"^/(?:api/v1|apis/apps/v1|apis/gateway\.networking\.k8s\.io/v1beta1"
+    r"|apis/coordination\.k8s\.io/v1)/namespaces/(?P<ns>[^/]+)/(?P<kind>[a-z]+)"
+    r"(?:/(?P<name>[^/]+))?$"
+)
+_KINDS = {"deployments", "services", "httproutes", "leases", "daemonsets", "pods"}
+
+
+def _split_terms(selector):
+    terms, depth, current = [], 0, ""
+    for char in selector:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            terms.append(current.strip())
+            current = ""
+        else:
+            current += char
+    if current.strip():
+        terms.append(current.strip())
+    return terms
+
+
+def parse_selector(selector):
+    """
+    Turn a label selector into a predicate over a labels dict.
+    Supports ``k=v``, ``k==v``, ``k!=v``, ``k in (a,b)``, ``k notin (a,b)``, ``k``, ``!k``.
+    """
+    checks = []
+    for term in _split_terms(selector or ""):
+        match = re.match(r"^([\w./-]+)\s+(in|notin)\s+\((.*)\)$", term)
+        if match:
+            key, op, values = match.group(1), match.group(2), {
+                v.strip() for v in match.group(3).split(",")
+            }
+            if op == "in":
+                checks.append(lambda labels, k=key, vs=values: labels.get(k) in vs)
+            else:
+                checks.append(lambda labels, k=key, vs=values: labels.get(k) not in vs)
+        elif "!=" in term:
+            key, value = term.split("!=", 1)
+            checks.append(lambda labels, k=key.strip(), v=value.strip(): labels.get(k) != v)
+        elif "=" in term:
+            key, value = term.replace("==", "=").split("=", 1)
+            checks.append(lambda labels, k=key.strip(), v=value.strip(): labels.get(k) == v)
+        elif term.startswith("!"):
+            checks.append(lambda labels, k=term[1:].strip(): k not in labels)
+        else:
+            checks.append(lambda labels, k=term: k in labels)
+    return lambda labels: all(check(labels or {}) for check in checks)
+
+
+def parse_field_selector(selector):
+    """
+    Predicate over an object's metadata for ``metadata.name=x`` style selectors.
+    """
+    checks = []
+    for term in _split_terms(selector or ""):
+        negate = "!=" in term
+        key, value = term.replace("!=", "=").replace("==", "=").split("=", 1)
+        field = key.strip().split(".", 1)[-1]
+        checks.append(lambda meta, f=field, v=value.strip(), n=negate: (meta.get(f) == v) != n)
+    return lambda meta: all(check(meta) for check in checks)
+
+
+def _merge(target, patch):
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = copy.deepcopy(value)
+    return target
+
+
+class FakeCluster:
+    def __init__(self, ready_delay=2.0):
+        self.ready_delay = ready_delay
+        self.lock = threading.Condition()
+        self.objects = {kind: {} for kind in _KINDS}
+        self.events = {kind: [] for kind in _KINDS}
+        self.resource_version = 0
+        self.requests = 0
+
+    def _bump(self, kind, event_type, obj):
+        self.resource_version += 1
+        obj["metadata"]["resourceVersion"] = str(self.resource_version)
+        self.events[kind].append((self.resource_version, event_type, copy.deepcopy(obj)))
+        del self.events[kind][:-5000]
+        self.lock.notify_all()
+
+    def create(self, kind, namespace, body):
+        with self.lock:
+            name = body["metadata"]["name"]
+            if name in self.objects[kind]:
+                return 409, {"kind": "Status", "code": 409, "message": f"{name} already exists"}
+            obj = copy.deepcopy(body)
+            obj["metadata"].update(
+                {
+                    "namespace": namespace,
+                    "uid": str(uuid.uuid4()),
+                    "creationTimestamp": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+                }
+            )
+            if kind == "deployments":
+                obj["status"] = {}
+                threading.Timer(self.ready_delay, self._mark_ready, args=(name, obj["metadata"]["uid"])).start()
+            self.objects[kind][name] = obj
+            self._bump(kind, "ADDED", obj)
+            return 201, obj
+
+    def _mark_ready(self, name, uid):
+        with self.lock:
+            obj = self.objects["deployments"].get(name)
+            if not obj or obj["metadata"]["uid"] != uid:
+                return
+            obj["status"] = self._deployment_status(obj)
+            self._bump("deployments", "MODIFIED", obj)
+
+    def _deployment_status(self, obj):
+        replicas = (obj.get("spec") or {}).get("replicas", 1)
+        if not replicas:
+            return {"replicas": 0}
+        return {
+            "replicas": replicas,
+            "availableReplicas": replicas,
+            "readyReplicas": replicas,
+            "conditions": [{"type": "Available", "status": "True"}],
+        }
+
+    def get(self, kind, name):
+        with self.lock:
+            obj = self.objects[kind].get(name)
+            if not obj:
+                return 404, {"kind": "Status", "code": 404, "message": f"{name} not found"}
+            return 200, copy.deepcopy(obj)
+
+    def list(self, kind, selector, field_selector=None):
+        match = parse_selector(selector)
+        fields = parse_field_selector(field_selector)
+        with self.lock:
+            items = [
+                copy.deepcopy(obj)
+                for obj in self.objects[kind].values()
+                if match(obj["metadata"].get("labels")) and fields(obj["metadata"])
+            ]
+            return 200, {
+                "kind": "List",
+                "metadata": {"resourceVersion": str(self.resource_version)},
+                "items": items,
+            }
+
+    def update(self, kind, namespace, name, body, patch=False, apply=False):
+        with self.lock:
+            obj = self.objects[kind].get(name)
+            if not obj:
+                if apply:
+                    return self.create(kind, namespace, body)
+                return 404, {"kind": "Status", "code": 404, "message": f"{name} not found"}
+            wanted = (body.get("metadata") or {}).get("resourceVersion")
+            if wanted and wanted != obj["metadata"]["resourceVersion"]:
+                return 409, {"kind": "Status", "code": 409, "message": "conflict"}
+            replicas = (obj.get("spec") or {}).get("replicas", 1)
+            status = obj.get("status")
+            if patch:
+                body = copy.deepcopy(body)
+                (body.get("metadata") or {}).pop("resourceVersion", None)
+                _merge(obj, body)
+            else:
+                metadata = obj["metadata"]
+                obj = copy.deepcopy(body)
+                obj["metadata"] = {**metadata, **obj.get("metadata", {})}
+                self.objects[kind][name] = obj
+            if kind == "deployments":
+                obj["status"] = status
+                wanted = (obj.get("spec") or {}).get("replicas", 1)
+                if wanted != replicas:
+                    # Scaling up starts a fresh pod; scaling to zero is immediate.
+                    obj["status"] = self._deployment_status(obj) if not wanted else {}
+                    if wanted and not replicas:
+                        threading.Timer(
+                            self.ready_delay, self._mark_ready, args=(name, obj["metadata"]["uid"])
+                        ).start()
+            self._bump(kind, "MODIFIED", obj)
+            return 200, copy.deepcopy(obj)
+
+    def delete(self, kind, name):
+        with self.lock:
+            obj = self.objects[kind].pop(name, None)
+            if not obj:
+                return 404, {"kind": "Status", "code": 404, "message": f"{name} not found"}
+            self._bump(kind, "DELETED", obj)
+            return 200, {"kind": "Status", "status": "Success"}
+
+    def delete_collection(self, kind, selector):
+        match = parse_selector(selector)
+        with self.lock:
+            names = [
+                name
+                for name, obj in self.objects[kind].items()
+                if match(obj["metadata"].get("labels"))
+            ]
+            for name in names:
+                self._bump(kind, "DELETED", self.objects[kind].pop(name))
+            return 200, {"kind": "List", "items": []}
+
+    def watch(self, kind, selector, resource_version, timeout, field_selector=None):
+        match = parse_selector(selector)
+        fields = parse_field_selector(field_selector)
+        since = int(resource_version or 0)
+        deadline = time.monotonic() + timeout
+        while True:
+            with self.lock:
+                pending = [e for e in self.events[kind] if e[0] > since]
+                if not pending:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return
+                    self.lock.wait(min(remaining, 1.0))
+                    continue
+            for version, event_type, obj in pending:
+                since = version
+                if match(obj["metadata"].get("labels")) and fields(obj["metadata"]):
+                    yield {"type": event_type, "object": obj}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    cluster = None
+    latency = 0.0
+    tls_context = None
+
+    def setup(self):
+        # Handshake in the handler thread so a slow client doesn't block accept().
+        self.request = self.tls_context.wrap_socket(self.request, server_side=True)
+        super().setup()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, payload):
+        raw = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length).decode() or "{}")
+
+    def _route(self):
+        url = urlparse(self.path)
+        match = _PATH_RE.match(url.path)
+        if not match or match.group("kind") not in _KINDS:
+            self._send(404, {"kind": "Status", "code": 404, "message": "unknown path"})
+            return None
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        return match.group("ns"), match.group("kind"), match.group("name"), query
+
+    def _handle(self):
+        self.cluster.requests += 1
+        route = self._route()
+        if route is None:
+            return
+        namespace, kind, name, query = route
+        body = self._body()
+        if self.command == "GET" and query.get("watch") in {"1", "true"}:
+            self._stream_watch(kind, query)
+            return
+        if self.latency:
+            time.sleep(self.latency)
+        if self.command == "GET":
+            if name:
+                self._send(*self.cluster.get(kind, name))
+            else:
+                self._send(
+                    *self.cluster.list(kind, query.get("labelSelector"), query.get("fieldSelector"))
+                )
+        elif self.command == "POST":
+            self._send(*self.cluster.create(kind, namespace, body))
+        elif self.command == "PUT":
+            self._send(*self.cluster.update(kind, namespace, name, body))
+        elif self.command == "PATCH":
+            apply = "apply-patch" in (self.headers.get("Content-Type") or "")
+            self._send(*self.cluster.update(kind, namespace, name, body, patch=True, apply=apply))
+        elif self.command == "DELETE":
+            if name:
+                self._send(*self.cluster.delete(kind, name))
+            else:
+                self._send(*self.cluster.delete_collection(kind, query.get("labelSelector")))
+        else:
+            self._send(405, {"kind": "Status", "code": 405, "message": "method not allowed"})
+
+    def _stream_watch(self, kind, query):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        timeout = float(query.get("timeoutSeconds") or 60)
+        try:
+            for event in self.cluster.watch(
+                kind,
+                query.get("labelSelector"),
+                query.get("resourceVersion"),
+                timeout,
+                query.get("fieldSelector"),
+            ):
+                line = (json.dumps(event) + "\n").encode()
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError, ssl.SSLError):
+            pass
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+
+def _self_signed_context(directory):
+    cert = os.path.join(directory, "tls.crt")
+    key = os.path.join(directory, "tls.key")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", key, "-out", cert, "-days", "1", "-subj", "/CN=localhost",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+def start_fake_api(port=0, latency=0.0, ready_delay=2.0):
+    """
+    Start the stub in a background thread.
+    Returns (server, cluster, workdir); workdir holds a dummy service-account token.
+    """
+    workdir = tempfile.mkdtemp(prefix="fake-k8s-")
+    with open(os.path.join(workdir, "token"), "w", encoding="utf-8") as fp:
+        fp.write("fake-token")
+    cluster = FakeCluster(ready_delay=ready_delay)
+    handler = type(
+        "FakeK8sHandler",
+        (_Handler,),
+        {"cluster": cluster, "latency": latency, "tls_context": _self_signed_context(workdir)},
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, cluster, workdir
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=8443)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--ready-delay", type=float, default=2.0)
+    args = parser.parse_args()
+    server, _, workdir = start_fake_api(args.port, args.latency, args.ready_delay)
+    print(f"Fake Kubernetes API on https://127.0.0.1:{server.server_port}")
+    print(f"Token file: {os.path.join(workdir, 'token')}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+End-to-end throughput of the plugin's hot endpoints against the local fake
+Kubernetes API (benchmarks/fake_k8s.py).
+
+Builds a throwaway CTFd app with the plugin loaded, creates users, challenges
+and configs, then measures at each concurrency level:
+
+  spawn    POST /plugins/podspawner/spawn/<id>, one per user
+  ready    time from spawn until /status reports READY
+  status1  GET /plugins/podspawner/status/<id> (single instance)
+  status   GET /plugins/podspawner/status?ids=... (batched)
+  stop     POST /plugins/podspawner/stop/<id>
+  cleanup  cleanup_expired_instances() over the same number of expired rows
+
+    python benchmarks/throughput.py --users 200 --concurrency 1,8,32
+    python benchmarks/throughput.py --api-latency 0.05 --informer
+
+Run it from an environment where CTFd is importable and this plugin is
+installed under CTFd/plugins/<--plugin-name>. The database defaults to a
+temporary SQLite file; pass --database-url to use MySQL/Postgres instead.
+"""
+import argparse
+import importlib
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from fake_k8s import start_fake_api
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _summary(label, samples, elapsed):
+    if not samples:
+        return f"  {label:<8} no samples"
+    return (
+        f"  {label:<8} n={len(samples):<6} "
+        f"p50 {_percentile(samples, 0.50) * 1e3:8.1f} ms  "
+        f"p99 {_percentile(samples, 0.99) * 1e3:8.1f} ms  "
+        f"{len(samples) / elapsed:8.1f} req/s"
+    )
+
+
+def _build_app(args, api_port, token_path):
+    from CTFd import create_app
+    from CTFd.config import TestingConfig
+
+    database_url = args.database_url or "sqlite:///" + os.path.join(
+        tempfile.mkdtemp(prefix="podspawner-bench-"), "ctfd.db"
+    )
+    settings = {
+        "SQLALCHEMY_DATABASE_URI": database_url,
+        "SERVER_NAME": "localhost",
+        "SAFE_MODE": False,
+        "PODSPAWNER_API_HOST": f"127.0.0.1:{api_port}",
+        "PODSPAWNER_NAMESPACE": "ctf",
+        "PODSPAWNER_TOKEN_PATH": token_path,
+        "PODSPAWNER_CA_PATH": os.path.join(os.path.dirname(token_path), "missing-ca.crt"),
+        "PODSPAWNER_BASE_DOMAIN": "bench.local",
+        "PODSPAWNER_RATE_LIMIT_SECONDS": 0,
+        "PODSPAWNER_INFORMER_ENABLED": args.informer,
+        "PODSPAWNER_LEADER_ELECTION": False,
+        # Keep the periodic loops out of the measurements.
+        "PODSPAWNER_CLEANUP_INTERVAL": 86400,
+        "PODSPAWNER_WARM_POOL_INTERVAL": 86400,
+        "PODSPAWNER_RECONCILE_INTERVAL": 86400,
+        "PODSPAWNER_SPAWN_WORKERS": args.spawn_workers,
+        "PODSPAWNER_SPAWN_QUEUE_SIZE": args.users * 2,
+    }
+    config = type("BenchmarkConfig", (TestingConfig,), settings)
+    return create_app(config)
+
+
+def _seed(app, args):
+    from CTFd.models import Admins, Challenges, Users, db
+    from CTFd.utils import set_config
+
+    models = importlib.import_module(f"CTFd.plugins.{args.plugin_name}.models")
+    with app.app_context():
+        set_config("setup", True)
+        set_config("ctf_name", "podspawner-bench")
+        db.session.add(Admins(name="admin", email="admin@bench.local", password="password"))
+        challenge_ids = []
+        for idx in range(args.challenges):
+            chal = Challenges(
+                name=f"bench-{idx}",
+                description="benchmark",
+                value=100,
+                category="bench",
+                type="standard",
+                state="visible",
+            )
+            db.session.add(chal)
+            db.session.flush()
+            db.session.add(
+                models.K8sChallengeConfig(
+                    challenge_id=chal.id,
+                    image="nginx:alpine",
+                    container_port=80,
+                    cpu_request="50m",
+                    cpu_limit="100m",
+                    mem_request="32Mi",
+                    mem_limit="64Mi",
+                    ttl_seconds=1800,
+                    protocol="http",
+                    enabled=True,
+                )
+            )
+            challenge_ids.append(chal.id)
+        for idx in range(args.users):
+            db.session.add(
+                Users(name=f"bench{idx}", email=f"bench{idx}@bench.local", password="password")
+            )
+        db.session.commit()
+    return challenge_ids
+
+
+class _Session:
+    """
+    One logged-in test client per simulated player.
+    """
+
+    def __init__(self, app, name):
+        self.client = app.test_client()
+        self.client.get("/login")
+        with self.client.session_transaction() as sess:
+            nonce = sess.get("nonce")
+        self.client.post("/login", data={"name": name, "password": "password", "nonce": nonce})
+        with self.client.session_transaction() as sess:
+            self.nonce = sess.get("nonce")
+
+    def post(self, path):
+        return self.client.post(path, json={}, headers={"CSRF-Token": self.nonce})
+
+    def get(self, path):
+        return self.client.get(path)
+
+
+def _run(concurrency, jobs):
+    """
+    Run callables on ``concurrency`` threads; returns (latencies, failures, elapsed).
+    """
+    lock = threading.Lock()
+    latencies, failures = [], []
+
+    def timed(job):
+        started = time.perf_counter()
+        ok = job()
+        took = time.perf_counter() - started
+        with lock:
+            (latencies if ok else failures).append(took)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, jobs))
+    return latencies, failures, time.perf_counter() - started
+
+
+def _wait_ready(sessions, challenge_id, spawned_at, timeout):
+    ready_after = []
+    waiting = dict(enumerate(sessions))
+    deadline = time.monotonic() + timeout
+    while waiting and time.monotonic() < deadline:
+        for idx, session in list(waiting.items()):
+            data = session.get(f"/plugins/podspawner/status/{challenge_id}").get_json() or {}
+            instance = data.get("instance") or {}
+            if instance.get("status") == "READY":
+                ready_after.append(time.perf_counter() - spawned_at[idx])
+                del waiting[idx]
+        time.sleep(0.1)
+    return ready_after, len(waiting)
+
+
+def _expire_and_cleanup(app, args, challenge_id, sessions, concurrency):
+    routes = importlib.import_module(f"CTFd.plugins.{args.plugin_name}.routes")
+    models = importlib.import_module(f"CTFd.plugins.{args.plugin_name}.models")
+    _run(
+        concurrency,
+        [lambda s=s: s.post(f"/plugins/podspawner/spawn/{challenge_id}").status_code < 300 for s in sessions],
+    )
+    with app.app_context():
+        models.K8sInstance.query.filter(
+            models.K8sInstance.challenge_id == challenge_id,
+            models.K8sInstance.status.in_((models.STATUS_PENDING, models.STATUS_READY)),
+        ).update(
+            {models.K8sInstance.expires_at: datetime.utcnow() - timedelta(seconds=1)},
+            synchronize_session=False,
+        )
+        models.db.session.commit()
+        started = time.perf_counter()
+        cleaned = routes.cleanup_expired_instances()
+        return cleaned, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--challenges", type=int, default=5)
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--status-requests", type=int, default=1000)
+    parser.add_argument("--api-latency", type=float, default=0.01)
+    parser.add_argument("--ready-delay", type=float, default=1.0)
+    parser.add_argument("--ready-timeout", type=float, default=120.0)
+    parser.add_argument("--spawn-workers", type=int, default=8)
+    parser.add_argument("--informer", action="store_true")
+    parser.add_argument("--database-url")
+    parser.add_argument("--plugin-name", default="podspawner")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.concurrency.split(",") if level]
+    if len(levels) * 2 > args.challenges:
+        # Each level spawns on one challenge and runs cleanup on another.
+        args.challenges = len(levels) * 2
+
+    server, cluster, workdir = start_fake_api(
+        latency=args.api_latency, ready_delay=args.ready_delay
+    )
+    app = _build_app(args, server.server_port, os.path.join(workdir, "token"))
+    challenge_ids = _seed(app, args)
+    sessions = [_Session(app, f"bench{idx}") for idx in range(args.users)]
+    batch_ids = ",".join(str(chal_id) for chal_id in challenge_ids)
+
+    print(
+        f"{args.users} users, {args.challenges} challenges, API latency "
+        f"{args.api_latency * 1e3:.0f} ms, ready delay {args.ready_delay:.1f} s, "
+        f"informer {'on' if args.informer else 'off'}"
+    )
+    for level_idx, concurrency in enumerate(levels):
+        challenge_id = challenge_ids[level_idx * 2]
+        print(f"concurrency {concurrency}:")
+        spawned_at = {}
+
+        def spawn(idx, session):
+            spawned_at[idx] = time.perf_counter()
+            return session.post(f"/plugins/podspawner/spawn/{challenge_id}").status_code < 300
+
+        latencies, failures, elapsed = _run(
+            concurrency, [lambda i=i, s=s: spawn(i, s) for i, s in enumerate(sessions)]
+        )
+        print(_summary("spawn", latencies, elapsed) + f"  failed {len(failures)}")
+
+        ready_after, stuck = _wait_ready(sessions, challenge_id, spawned_at, args.ready_timeout)
+        if ready_after:
+            print(
+                f"  {'ready':<8} n={len(ready_after):<6} "
+                f"p50 {_percentile(ready_after, 0.50):8.2f} s   "
+                f"p99 {_percentile(ready_after, 0.99):8.2f} s   not ready {stuck}"
+            )
+
+        api_before = cluster.requests
+        latencies, failures, elapsed = _run(
+            concurrency,
+            [
+                lambda s=sessions[idx % len(sessions)]: s.get(
+                    f"/plugins/podspawner/status/{challenge_id}"
+                ).status_code == 200
+                for idx in range(args.status_requests)
+            ],
+        )
+        print(
+            _summary("status1", latencies, elapsed)
+            + f"  failed {len(failures)}  k8s calls {cluster.requests - api_before}"
+        )
+
+        api_before = cluster.requests
+        latencies, failures, elapsed = _run(
+            concurrency,
+            [
+                lambda s=sessions[idx % len(sessions)]: s.get(
+                    f"/plugins/podspawner/status?ids={batch_ids}"
+                ).status_code == 200
+                for idx in range(args.status_requests)
+            ],
+        )
+        print(
+            _summary("status", latencies, elapsed)
+            + f"  failed {len(failures)}  k8s calls {cluster.requests - api_before}"
+        )
+
+        latencies, failures, elapsed = _run(
+            concurrency,
+            [lambda s=s: s.post(f"/plugins/podspawner/stop/{challenge_id}").status_code < 300 for s in sessions],
+        )
+        print(_summary("stop", latencies, elapsed) + f"  failed {len(failures)}")
+
+        cleaned, took = _expire_and_cleanup(
+            app, args, challenge_ids[level_idx * 2 + 1], sessions, concurrency
+        )
+        print(f"  {'cleanup':<8} {cleaned} instances in {took:.2f} s")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
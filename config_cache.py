@@ -0,0 +1,73 @@
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+from CTFd.models import Configs, db
+from CTFd.utils import set_config
+
+VERSION_KEY = "podspawner_config_version"
+
+
+class ConfigEntry(SimpleNamespace):
+    """
+    Cached lookup result for one challenge: whether the challenge exists, a
+    detached snapshot of its K8sChallengeConfig (or None) and the validation outcome.
+    """
+
+
+class ChallengeConfigCache:
+    """
+    Read-through cache of challenge configs. A version token stored in CTFd's
+    config table is re-read at most every ``check_interval`` seconds; when it
+    changes (an admin saved a config in any process) the cache is dropped.
+    """
+
+    def __init__(self, check_interval=5):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._version = None
+        self._checked_at = 0.0
+
+    def _read_version(self):
+        return db.session.query(Configs.value).filter_by(key=VERSION_KEY).scalar()
+
+    def _sync_version(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        version = self._read_version()
+        with self._lock:
+            self._checked_at = now
+            if version != self._version:
+                self._version = version
+                self._entries = {}
+
+    def get(self, challenge_id, loader):
+        self._sync_version()
+        with self._lock:
+            entry = self._entries.get(challenge_id)
+        if entry is None:
+            entry = loader(challenge_id)
+            with self._lock:
+                self._entries[challenge_id] = entry
+        return entry
+
+    def invalidate(self):
+        """
+        Drop local entries and publish a new version for the other processes.
+        """
+        version = uuid.uuid4().hex
+        set_config(VERSION_KEY, version)
+        with self._lock:
+            self._entries = {}
+            self._version = version
+            self._checked_at = time.monotonic()
+
+
+def snapshot_config(config):
+    return SimpleNamespace(**config.to_dict()) if config else None
+
+
+config_cache = ChallengeConfigCache()
@@ -0,0 +1,71 @@
+import heapq
+import threading
+import time
+from datetime import datetime
+
+
+class ExpiryScheduler:
+    """
+    Min-heap of instance expiry times, so teardown can fire at the second an
+    instance expires instead of on the next database sweep.
+
+    Rescheduling or cancelling only updates ``_deadlines``; the superseded heap
+    entries are skipped when they reach the top.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._heap = []
+        self._deadlines = {}
+
+    def __len__(self):
+        with self._cond:
+            return len(self._deadlines)
+
+    def schedule(self, instance_id, expires_at):
+        with self._cond:
+            if self._deadlines.get(instance_id) == expires_at:
+                return
+            self._deadlines[instance_id] = expires_at
+            heapq.heappush(self._heap, (expires_at, instance_id))
+            if len(self._heap) > 2 * len(self._deadlines) + 1000:
+                self._heap = [(at, iid) for iid, at in self._deadlines.items()]
+                heapq.heapify(self._heap)
+            if self._heap[0][1] == instance_id:
+                # New earliest deadline: wake the waiter so it re-arms its timer.
+                self._cond.notify_all()
+
+    def cancel(self, instance_id):
+        with self._cond:
+            self._deadlines.pop(instance_id, None)
+
+    def wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def wait_due(self, timeout, limit=200):
+        """
+        Block until at least one instance is due or ``timeout`` seconds pass.
+        Returns up to ``limit`` due instance ids, removed from the schedule.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = datetime.utcnow()
+                due = []
+                while self._heap and self._heap[0][0] <= now and len(due) < limit:
+                    expires_at, instance_id = heapq.heappop(self._heap)
+                    if self._deadlines.get(instance_id) == expires_at:
+                        del self._deadlines[instance_id]
+                        due.append(instance_id)
+                if due:
+                    return due
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                if self._heap:
+                    remaining = min(remaining, (self._heap[0][0] - now).total_seconds())
+                self._cond.wait(max(remaining, 0.01))
+
+
+expiry_scheduler = ExpiryScheduler()
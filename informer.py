@@ -0,0 +1,169 @@
+import random
+import threading
+import time
+
+from .k8s_client import K8sApiError, parse_deployment_status
+
+MANAGED_SELECTOR = "ctf.managed=true"
+
+
+class DeploymentInformer:
+    """
+    In-memory mirror of the managed Deployments, kept up to date by a
+    list+watch loop so status lookups don't need a round-trip to the API server.
+    """
+
+    def __init__(self, label_selector=MANAGED_SELECTOR, max_staleness=30):
+        self.label_selector = label_selector
+        self.max_staleness = max_staleness
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._store = {}
+        self._synced = False
+        self._connected = False
+        self._disconnected_at = None
+        self.resource_version = None
+
+    def get(self, name):
+        """
+        Return the cached status of a deployment, shaped like
+        K8sClient.get_deployment_status, or None when the cache can't be trusted.
+        """
+        if not self.is_fresh():
+            return None
+        with self._lock:
+            status = self._store.get(name)
+        if status is None:
+            return {"exists": False, "ready": False, "available_replicas": 0}
+        return status
+
+    def wait_ready(self, name, timeout):
+        """
+        Block until the cached deployment is ready or ``timeout`` seconds pass.
+        Returns its last status, or None when the cache can't be trusted.
+        """
+        deadline = time.monotonic() + timeout
+        while self.is_fresh():
+            with self._changed:
+                status = self._store.get(name)
+                remaining = deadline - time.monotonic()
+                if (status and status["ready"]) or remaining <= 0:
+                    return status or {"exists": False, "ready": False, "available_replicas": 0}
+                # Bounded so a disconnected informer is noticed.
+                self._changed.wait(min(remaining, 1.0))
+        return None
+
+    def wait_change(self, name, since, timeout):
+        """
+        Block until the cached status of a deployment differs from ``since`` (a
+        value previously returned by get or wait_change) or ``timeout`` seconds
+        pass. Returns its current status, or None when the cache can't be trusted.
+        """
+        deadline = time.monotonic() + timeout
+        while self.is_fresh():
+            with self._changed:
+                status = self._store.get(name) or {
+                    "exists": False,
+                    "ready": False,
+                    "available_replicas": 0,
+                }
+                remaining = deadline - time.monotonic()
+                if status != since or remaining <= 0:
+                    return status
+                self._changed.wait(min(remaining, 1.0))
+        return None
+
+    def is_fresh(self):
+        if not self._synced:
+            return False
+        if self._connected:
+            return True
+        return (
+            self._disconnected_at is not None
+            and time.monotonic() - self._disconnected_at < self.max_staleness
+        )
+
+    def _replace(self, items, resource_version):
+        store = {}
+        for obj in items:
+            name = (obj.get("metadata") or {}).get("name")
+            if name:
+                store[name] = parse_deployment_status(obj)
+        with self._lock:
+            self._store = store
+            self.resource_version = resource_version
+            self._synced = True
+            self._changed.notify_all()
+
+    def _apply(self, event):
+        """
+        Apply one watch event. Returns False when the watch must be restarted
+        from a fresh LIST (410 Gone).
+        """
+        kind = event.get("type")
+        obj = event.get("object") or {}
+        metadata = obj.get("metadata") or {}
+        if kind == "ERROR":
+            if obj.get("code") == 410:
+                return False
+            raise K8sApiError(obj.get("code") or 500, obj.get("message") or "watch error", obj)
+        if metadata.get("resourceVersion"):
+            self.resource_version = metadata["resourceVersion"]
+        if kind == "BOOKMARK":
+            return True
+        name = metadata.get("name")
+        if not name:
+            return True
+        with self._lock:
+            if kind == "DELETED":
+                self._store.pop(name, None)
+            else:
+                self._store[name] = parse_deployment_status(obj)
+            self._changed.notify_all()
+        return True
+
+    def _mark_disconnected(self):
+        if self._connected or self._disconnected_at is None:
+            self._disconnected_at = time.monotonic()
+        self._connected = False
+
+    def run(self, app, client_factory, watch_timeout=300):
+        backoff = 1
+        relist = True
+        while True:
+            try:
+                with app.app_context():
+                    client = client_factory()
+                if relist or not self.resource_version:
+                    items, resource_version = client.list_deployments(self.label_selector)
+                    self._replace(items, resource_version)
+                    relist = False
+                events = client.watch_deployments(
+                    label_selector=self.label_selector,
+                    resource_version=self.resource_version,
+                    timeout_seconds=watch_timeout,
+                )
+                self._connected = True
+                backoff = 1
+                for event in events:
+                    if not self._apply(event):
+                        relist = True
+                        break
+                # Server-side timeout: resume from the last resourceVersion.
+            except K8sApiError as exc:
+                self._mark_disconnected()
+                if exc.status == 410:
+                    relist = True
+                else:
+                    app.logger.warning("Deployment informer error: %s", exc)
+                    relist = True
+                    time.sleep(backoff + random.random())
+                    backoff = min(backoff * 2, 30)
+            except Exception as exc:
+                self._mark_disconnected()
+                app.logger.warning("Deployment informer connection lost: %s", exc)
+                time.sleep(backoff + random.random())
+                backoff = min(backoff * 2, 30)
+
+
+deployment_informer = DeploymentInformer()
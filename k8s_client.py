@@ -1,7 +1,29 @@
 import json
 import os
+import queue
+import random
 import ssl
+import threading
+import time
 import http.client
+from urllib.parse import urlencode
+
+from .manifests import (
+    deployment_template,
+    http_route_template,
+    resources_key,
+    service_template,
+)
+from .metrics import observe_api_request, observe_api_retry
+
+FIELD_MANAGER = "ctfd-podspawner"
+
+# Throttling (API Priority and Fairness) and server-side failures worth retrying.
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Methods the API server applies idempotently, so resending after a lost
+# response cannot create a second object. POST is only resent when the server
+# provably did not act on it: a 429 or a refused connection.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "PATCH", "DELETE"})
 
 
 class K8sApiError(Exception):
@@ -11,6 +33,107 @@ class K8sApiError(Exception):
         self.payload = payload or {}
 
 
+class ClusterBusyError(K8sApiError):
+    """
+    Raised without contacting the API server while the circuit breaker is open.
+    """
+
+    def __init__(self, retry_after):
+        super().__init__(503, "Kubernetes API is busy, retry later")
+        self.retry_after = retry_after
+
+
+def is_transient(exc):
+    """
+    True for failures that say nothing about the object itself (throttling,
+    API server trouble) and should be retried later rather than recorded.
+    """
+    if isinstance(exc, K8sApiError):
+        return exc.status in RETRYABLE_STATUSES
+    return isinstance(exc, (http.client.HTTPException, OSError))
+
+
+def _parse_retry_after(value):
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Opens after ``threshold`` consecutive transient failures and then fails
+    calls fast for ``cooldown`` seconds, or for the server's Retry-After when
+    that is longer. Afterwards a single probe is let through: success closes
+    the breaker, failure opens it again.
+    """
+
+    def __init__(self, threshold=5, cooldown=15):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._open_until = 0.0
+        self._probing = False
+
+    def allow(self):
+        with self._lock:
+            if self._failures < self.threshold:
+                return True
+            if time.monotonic() < self._open_until or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def retry_after(self):
+        with self._lock:
+            if self._failures < self.threshold:
+                return 0
+            return max(1, int(self._open_until - time.monotonic() + 0.999))
+
+    def is_open(self):
+        with self._lock:
+            return self._failures >= self.threshold and (
+                self._probing or time.monotonic() < self._open_until
+            )
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self, retry_after=None):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._failures >= self.threshold:
+                self._open_until = time.monotonic() + max(self.cooldown, retry_after or 0)
+
+
+def parse_deployment_status(payload):
+    payload = payload if isinstance(payload, dict) else {}
+    status = payload.get("status", {})
+    available = status.get("availableReplicas", 0) or 0
+    ready_replicas = status.get("readyReplicas", 0) or 0
+    conditions = {c.get("type"): c.get("status") for c in status.get("conditions", [])}
+    ready = available > 0 or conditions.get("Available") == "True"
+    generation = (payload.get("metadata") or {}).get("generation")
+    observed = status.get("observedGeneration")
+    if generation is not None and observed is not None and observed < generation:
+        # The controller hasn't acted on the latest spec (a scale-up from zero
+        # still reports the 0-replica Deployment as Available).
+        ready = False
+    if (payload.get("spec") or {}).get("replicas") == 0:
+        ready = False
+    return {
+        "exists": True,
+        "ready": bool(ready),
+        "available_replicas": available,
+        "ready_replicas": ready_replicas,
+        "conditions": conditions,
+    }
+
+
 class K8sClient:
     """
     Minimal HTTP client for Kubernetes API using stdlib only.
@@ -23,12 +146,31 @@ class K8sClient:
         token_path="/var/run/secrets/kubernetes.io/serviceaccount/token",
         ca_path="/var/run/secrets/kubernetes.io/serviceaccount/ca.crt",
         timeout=5,
+        pool_size=10,
+        max_retries=3,
+        backoff_base=0.2,
+        backoff_max=5,
+        retry_budget=10,
+        breaker_threshold=5,
+        breaker_cooldown=15,
     ):
-        self.host = host
+        # "host:port" is accepted for API servers not listening on 443.
+        self.host, _, port = host.partition(":") if host.count(":") == 1 else (host, "", "")
+        self.port = int(port) if port else 443
         self.namespace = namespace
+        self.token_path = token_path
+        self._token_lock = threading.Lock()
+        self._token_mtime = self._file_mtime(token_path)
         self.token = self._read_file(token_path)
         self.ssl_context = self._build_ssl_context(ca_path)
         self.timeout = timeout
+        # Idle keep-alive connections, most recently used first.
+        self._pool = queue.LifoQueue(maxsize=max(1, pool_size))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_budget = retry_budget
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown)
 
     def _read_file(self, path):
         if not os.path.exists(path):
@@ -36,6 +178,25 @@ class K8sClient:
         with open(path, "r", encoding="utf-8") as fp:
             return fp.read().strip()
 
+    def _file_mtime(self, path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _current_token(self):
+        # Projected service-account tokens are rotated in place by the kubelet.
+        mtime = self._file_mtime(self.token_path)
+        if mtime is not None and mtime != self._token_mtime:
+            with self._token_lock:
+                if mtime != self._token_mtime:
+                    try:
+                        self.token = self._read_file(self.token_path)
+                        self._token_mtime = mtime
+                    except (OSError, RuntimeError):
+                        pass
+        return self.token
+
     def _build_ssl_context(self, ca_path):
         if os.path.exists(ca_path):
             return ssl.create_default_context(cafile=ca_path)
@@ -44,22 +205,124 @@ class K8sClient:
         ctx.verify_mode = ssl.CERT_NONE
         return ctx
 
-    def _request(self, method, path, body=None, expected=(200, 201, 202, 204, 404)):
-        data = None
-        headers = {
-            "Authorization": f"Bearer {self.token}",
+    def _new_connection(self, timeout=None):
+        return http.client.HTTPSConnection(
+            self.host, self.port, context=self.ssl_context, timeout=timeout or self.timeout
+        )
+
+    def _acquire_connection(self):
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            return self._new_connection(), False
+
+    def _release_connection(self, conn):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _headers(self):
+        return {
+            "Authorization": f"Bearer {self._current_token()}",
             "Accept": "application/json",
         }
+
+    def _exchange(self, method, path, data, headers):
+        conn, reused = self._acquire_connection()
+        try:
+            conn.request(method, path, body=data, headers=headers)
+            resp = conn.getresponse()
+            raw = resp.read()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            if not reused:
+                raise
+            # The server dropped an idle keep-alive connection; retry once on a fresh one.
+            conn = self._new_connection()
+            try:
+                conn.request(method, path, body=data, headers=headers)
+                resp = conn.getresponse()
+                raw = resp.read()
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                raise
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release_connection(conn)
+        return resp, raw
+
+    def _retry_delay(self, attempt, deadline, retry_after=None):
+        """
+        Seconds to wait before the next attempt, or None to give up. Uses the
+        server's Retry-After when given, otherwise capped exponential backoff
+        with full jitter; never waits past the request's retry budget.
+        """
+        if attempt >= self.max_retries:
+            return None
+        if retry_after is None:
+            retry_after = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+        if time.monotonic() + retry_after > deadline:
+            return None
+        return retry_after
+
+    def _request(
+        self,
+        method,
+        path,
+        body=None,
+        expected=(200, 201, 202, 204, 404),
+        content_type="application/json",
+    ):
+        data = None
+        headers = self._headers()
         if body is not None:
-            data = json.dumps(body).encode()
-            headers["Content-Type"] = "application/json"
+            # Pre-rendered manifests arrive as bytes.
+            data = body if isinstance(body, bytes) else json.dumps(body).encode()
+            headers["Content-Type"] = content_type
 
-        conn = http.client.HTTPSConnection(
-            self.host, 443, context=self.ssl_context, timeout=self.timeout
-        )
-        conn.request(method, path, body=data, headers=headers)
-        resp = conn.getresponse()
-        raw = resp.read()
+        deadline = time.monotonic() + self.retry_budget
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise ClusterBusyError(self.breaker.retry_after())
+            started = time.perf_counter()
+            try:
+                resp, raw = self._exchange(method, path, data, headers)
+            except (http.client.HTTPException, OSError) as exc:
+                observe_api_request(method, path, "error", time.perf_counter() - started)
+                self.breaker.record_failure()
+                safe = method in IDEMPOTENT_METHODS or isinstance(exc, ConnectionRefusedError)
+                delay = self._retry_delay(attempt, deadline) if safe else None
+                if delay is None:
+                    raise
+                observe_api_retry(method, path, "error")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            observe_api_request(
+                method, path, resp.status, time.perf_counter() - started, expected
+            )
+            if resp.status not in RETRYABLE_STATUSES:
+                self.breaker.record_success()
+                break
+            retry_after = _parse_retry_after(resp.getheader("Retry-After"))
+            self.breaker.record_failure(retry_after)
+            safe = method in IDEMPOTENT_METHODS or resp.status == 429
+            delay = self._retry_delay(attempt, deadline, retry_after) if safe else None
+            if delay is None:
+                break
+            observe_api_retry(method, path, str(resp.status))
+            time.sleep(delay)
+            attempt += 1
         try:
             payload = json.loads(raw.decode() or "{}")
         except Exception:
@@ -72,10 +335,128 @@ class K8sClient:
             )
         return resp.status, payload
 
+    def _stream(self, path, read_timeout):
+        """
+        Yield decoded JSON lines from a long-lived GET (watch) response.
+        Uses a dedicated connection so pooled ones are never held by a watch.
+        """
+        conn = self._new_connection(timeout=read_timeout)
+        try:
+            conn.request("GET", path, headers=self._headers())
+            resp = conn.getresponse()
+            if resp.status != 200:
+                raw = resp.read()
+                try:
+                    payload = json.loads(raw.decode() or "{}")
+                except Exception:
+                    payload = {"raw": raw.decode(errors="ignore")}
+                message = payload.get("message") if isinstance(payload, dict) else payload
+                raise K8sApiError(
+                    resp.status, f"GET {path} failed with {resp.status}: {message}", payload
+                )
+            while True:
+                line = resp.readline()
+                if not line:
+                    return
+                line = line.strip()
+                if line:
+                    yield json.loads(line.decode())
+        finally:
+            conn.close()
+
     def _ns_path(self, path):
         return path.format(namespace=self.namespace)
 
-    def create_deployment(
+    def _list_all(self, path, label_selector=None, page_size=500):
+        """
+        Paginated LIST. Returns (items, resourceVersion) of the collection.
+        """
+        items = []
+        continue_token = None
+        resource_version = None
+        while True:
+            query = {"limit": page_size}
+            if label_selector:
+                query["labelSelector"] = label_selector
+            if continue_token:
+                query["continue"] = continue_token
+            _, payload = self._request("GET", f"{path}?{urlencode(query)}", expected=(200,))
+            items.extend(payload.get("items") or [])
+            metadata = payload.get("metadata") or {}
+            resource_version = metadata.get("resourceVersion")
+            continue_token = metadata.get("continue")
+            if not continue_token:
+                return items, resource_version
+
+    def _watch(
+        self,
+        path,
+        label_selector=None,
+        resource_version=None,
+        timeout_seconds=300,
+        field_selector=None,
+    ):
+        query = {
+            "watch": "1",
+            "allowWatchBookmarks": "true",
+            "timeoutSeconds": timeout_seconds,
+        }
+        if label_selector:
+            query["labelSelector"] = label_selector
+        if field_selector:
+            query["fieldSelector"] = field_selector
+        if resource_version:
+            query["resourceVersion"] = resource_version
+        # Leave the server time to close the watch cleanly before our socket times out.
+        return self._stream(f"{path}?{urlencode(query)}", read_timeout=timeout_seconds + 30)
+
+    def list_deployments(self, label_selector=None):
+        return self._list_all(
+            self._ns_path("/apis/apps/v1/namespaces/{namespace}/deployments"),
+            label_selector=label_selector,
+        )
+
+    def list_services(self, label_selector=None):
+        return self._list_all(
+            self._ns_path("/api/v1/namespaces/{namespace}/services"),
+            label_selector=label_selector,
+        )
+
+    def list_http_routes(self, label_selector=None):
+        return self._list_all(
+            self._ns_path("/apis/gateway.networking.k8s.io/v1beta1/namespaces/{namespace}/httproutes"),
+            label_selector=label_selector,
+        )
+
+    def list_pods(self, label_selector=None):
+        return self._list_all(
+            self._ns_path("/api/v1/namespaces/{namespace}/pods"),
+            label_selector=label_selector,
+        )
+
+    def watch_deployments(self, label_selector=None, resource_version=None, timeout_seconds=300):
+        return self._watch(
+            self._ns_path("/apis/apps/v1/namespaces/{namespace}/deployments"),
+            label_selector=label_selector,
+            resource_version=resource_version,
+            timeout_seconds=timeout_seconds,
+        )
+
+    def _apply(self, collection, name, body):
+        """
+        Server-Side Apply: creates the object or converges it on the given
+        manifest, so a retried spawn is a no-op instead of a 409.
+        """
+        query = urlencode({"fieldManager": FIELD_MANAGER, "force": "true"})
+        return self._request(
+            "PATCH",
+            f"{self._ns_path(collection)}/{name}?{query}",
+            body=body,
+            expected=(200, 201),
+            content_type="application/apply-patch+yaml",
+        )
+
+    def apply_deployment(
         self,
         name,
         image,
@@ -83,94 +464,22 @@ class K8sClient:
         resources,
         labels,
         protocol="TCP",
+        pod_labels=None,
     ):
-        manifest = {
-            "apiVersion": "apps/v1",
-            "kind": "Deployment",
-            "metadata": {
-                "name": name,
-                "namespace": self.namespace,
-                "labels": labels,
-            },
-            "spec": {
-                "replicas": 1,
-                "selector": {"matchLabels": labels},
-                "template": {
-                    "metadata": {
-                        "labels": labels,
-                    },
-                    "spec": {
-                        "automountServiceAccountToken": False,
-                        "hostNetwork": False,
-                        "hostPID": False,
-                        "hostIPC": False,
-                        "enableServiceLinks": False,
-                        "dnsPolicy": "ClusterFirst",
-                        "restartPolicy": "Always",
-                        "terminationGracePeriodSeconds": 10,
-                        "securityContext": {
-                            "runAsNonRoot": True,
-                            "seccompProfile": {"type": "RuntimeDefault"},
-                        },
-                        "containers": [
-                            {
-                                "name": "challenge",
-                                "image": image,
-                                "imagePullPolicy": "IfNotPresent",
-                                "ports": [
-                                    {
-                                        "containerPort": container_port,
-                                        "name": "challenge",
-                                        "protocol": protocol,
-                                    }
-                                ],
-                                "resources": resources,
-                                "securityContext": {
-                                    "runAsNonRoot": True,
-                                    "allowPrivilegeEscalation": False,
-                                    "privileged": False,
-                                    "capabilities": {"drop": ["ALL"]},
-                                    "seccompProfile": {"type": "RuntimeDefault"},
-                                },
-                            }
-                        ],
-                    },
-                },
-            },
-        }
-        return self._request(
-            "POST",
-            self._ns_path("/apis/apps/v1/namespaces/{namespace}/deployments"),
-            body=manifest,
-            expected=(200, 201, 202),
+        # pod_labels lets the Deployment's own labels change later (e.g. when a
+        # warm pod is claimed) without touching the immutable selector.
+        template = deployment_template(
+            self.namespace, image, container_port, resources_key(resources), protocol
         )
+        body = template.render(name=name, labels=labels, pod_labels=pod_labels or labels)
+        return self._apply("/apis/apps/v1/namespaces/{namespace}/deployments", name, body)
 
-    def create_service(self, name, selector_labels, port, target_port, labels, protocol="TCP"):
-        manifest = {
-            "apiVersion": "v1",
-            "kind": "Service",
-            "metadata": {"name": name, "namespace": self.namespace, "labels": labels},
-            "spec": {
-                "type": "ClusterIP",
-                "selector": selector_labels,
-                "ports": [
-                    {
-                        "name": "challenge",
-                        "port": port,
-                        "targetPort": target_port,
-                        "protocol": protocol,
-                    }
-                ],
-            },
-        }
-        return self._request(
-            "POST",
-            self._ns_path("/api/v1/namespaces/{namespace}/services"),
-            body=manifest,
-            expected=(200, 201, 202),
-        )
+    def apply_service(self, name, selector_labels, port, target_port, labels, protocol="TCP"):
+        template = service_template(self.namespace, port, target_port, protocol)
+        body = template.render(name=name, labels=labels, selector=selector_labels)
+        return self._apply("/api/v1/namespaces/{namespace}/services", name, body)
 
-    def create_http_route(
+    def apply_http_route(
         self,
         name,
         hostname,
@@ -180,36 +489,27 @@ class K8sClient:
         gateway_name,
         gateway_namespace=None,
     ):
-        manifest = {
-            "apiVersion": "gateway.networking.k8s.io/v1beta1",
-            "kind": "HTTPRoute",
-            "metadata": {"name": name, "namespace": self.namespace, "labels": labels},
-            "spec": {
-                "parentRefs": [
-                    {
-                        "name": gateway_name,
-                        **({"namespace": gateway_namespace} if gateway_namespace else {}),
-                    }
-                ],
-                "hostnames": [hostname],
-                "rules": [
-                    {
-                        "backendRefs": [
-                            {
-                                "name": service_name,
-                                "port": service_port,
-                            }
-                        ]
-                    }
-                ],
-            },
-        }
-        return self._request(
-            "POST",
-            self._ns_path("/apis/gateway.networking.k8s.io/v1beta1/namespaces/{namespace}/httproutes"),
-            body=manifest,
-            expected=(200, 201, 202),
+        template = http_route_template(self.namespace, service_port, gateway_name, gateway_namespace)
+        body = template.render(
+            name=name, labels=labels, hostname=hostname, service_name=service_name
         )
+        return self._apply(
+            "/apis/gateway.networking.k8s.io/v1beta1/namespaces/{namespace}/httproutes", name, body
+        )
+
+    def apply_daemonset(self, name, manifest):
+        return self._apply("/apis/apps/v1/namespaces/{namespace}/daemonsets", name, manifest)
+
+    def get_daemonset(self, name):
+        """
+        The DaemonSet payload, or None when it does not exist.
+        """
+        status_code, payload = self._request(
+            "GET",
+            self._ns_path(f"/apis/apps/v1/namespaces/{{namespace}}/daemonsets/{name}"),
+            expected=(200, 404),
+        )
+        return payload if status_code == 200 else None
 
     def get_deployment_status(self, name):
         status_code, payload = self._request(
@@ -219,18 +519,85 @@ class K8sClient:
         )
         if status_code == 404:
             return {"exists": False, "ready": False, "available_replicas": 0}
-        status = payload.get("status", {}) if isinstance(payload, dict) else {}
-        available = status.get("availableReplicas", 0) or 0
-        ready_replicas = status.get("readyReplicas", 0) or 0
-        conditions = {c.get("type"): c.get("status") for c in status.get("conditions", [])}
-        ready = available > 0 or conditions.get("Available") == "True"
-        return {
-            "exists": True,
-            "ready": bool(ready),
-            "available_replicas": available,
-            "ready_replicas": ready_replicas,
-            "conditions": conditions,
-        }
+        return parse_deployment_status(payload)
+
+    def wait_for_deployment_ready(self, name, timeout_seconds, current=None):
+        """
+        Block until the Deployment has an available replica or ``timeout_seconds``
+        pass, watching only that object. ``current`` is a Deployment payload the
+        caller already holds (e.g. an apply response), which saves the initial GET.
+        Returns the last status seen, shaped like get_deployment_status.
+        """
+        missing = {"exists": False, "ready": False, "available_replicas": 0}
+        deadline = time.monotonic() + timeout_seconds
+        path = self._ns_path("/apis/apps/v1/namespaces/{namespace}/deployments")
+        while True:
+            if current is None:
+                status_code, current = self._request("GET", f"{path}/{name}", expected=(200, 404))
+                if status_code == 404:
+                    return missing
+            status = parse_deployment_status(current)
+            resource_version = (current.get("metadata") or {}).get("resourceVersion")
+            remaining = deadline - time.monotonic()
+            if status["ready"] or remaining < 1:
+                return status
+            if self.breaker.is_open():
+                raise ClusterBusyError(self.breaker.retry_after())
+            relist = False
+            try:
+                for event in self._watch(
+                    path,
+                    resource_version=resource_version,
+                    timeout_seconds=int(remaining),
+                    field_selector=f"metadata.name={name}",
+                ):
+                    obj = event.get("object") or {}
+                    if event.get("type") == "ERROR":
+                        # 410 Gone: our resourceVersion is too old, start over from a GET.
+                        relist = True
+                        break
+                    if event.get("type") == "DELETED":
+                        return missing
+                    if event.get("type") in {"ADDED", "MODIFIED"}:
+                        current = obj
+                        if parse_deployment_status(obj)["ready"]:
+                            return parse_deployment_status(obj)
+            except (http.client.HTTPException, OSError):
+                # Waiting is best effort; report what we last saw.
+                return status
+            if relist:
+                current = None
+
+    def patch_deployment_labels(self, name, labels, resource_version=None):
+        """
+        Merge-patch the Deployment's own labels; a None value removes a label.
+        With resource_version set the patch fails with 409 if the object changed.
+        """
+        metadata = {"labels": labels}
+        if resource_version:
+            metadata["resourceVersion"] = resource_version
+        return self._request(
+            "PATCH",
+            self._ns_path(f"/apis/apps/v1/namespaces/{{namespace}}/deployments/{name}"),
+            body={"metadata": metadata},
+            expected=(200,),
+            content_type="application/merge-patch+json",
+        )
+
+    def scale_deployment(self, name, replicas):
+        """
+        Set the Deployment's replica count; used to suspend and wake idle instances.
+        """
+        return self._request(
+            "PATCH",
+            self._ns_path(
+                f"/apis/apps/v1/namespaces/{{namespace}}/deployments/{name}"
+                f"?fieldManager={FIELD_MANAGER}"
+            ),
+            body={"spec": {"replicas": replicas}},
+            expected=(200,),
+            content_type="application/merge-patch+json",
+        )
 
     def delete_deployment(self, name):
         body = {"propagationPolicy": "Background"}
@@ -256,3 +623,62 @@ class K8sClient:
             ),
             expected=(200, 202, 204, 404),
         )
+
+    def delete_daemonset(self, name):
+        return self._request(
+            "DELETE",
+            self._ns_path(f"/apis/apps/v1/namespaces/{{namespace}}/daemonsets/{name}"),
+            body={"propagationPolicy": "Background"},
+            expected=(200, 202, 204, 404),
+        )
+
+    def _delete_collection(self, path, label_selector, body=None):
+        query = urlencode({"labelSelector": label_selector})
+        return self._request(
+            "DELETE",
+            f"{path}?{query}",
+            body=body,
+            expected=(200, 202, 204, 404),
+        )
+
+    def delete_deployments(self, label_selector):
+        return self._delete_collection(
+            self._ns_path("/apis/apps/v1/namespaces/{namespace}/deployments"),
+            label_selector,
+            body={"propagationPolicy": "Background"},
+        )
+
+    def delete_services(self, label_selector):
+        return self._delete_collection(
+            self._ns_path("/api/v1/namespaces/{namespace}/services"),
+            label_selector,
+        )
+
+    def delete_http_routes(self, label_selector):
+        return self._delete_collection(
+            self._ns_path("/apis/gateway.networking.k8s.io/v1beta1/namespaces/{namespace}/httproutes"),
+            label_selector,
+        )
+
+    def get_lease(self, name):
+        return self._request(
+            "GET",
+            self._ns_path(f"/apis/coordination.k8s.io/v1/namespaces/{{namespace}}/leases/{name}"),
+            expected=(200, 404),
+        )
+
+    def create_lease(self, manifest):
+        return self._request(
+            "POST",
+            self._ns_path("/apis/coordination.k8s.io/v1/namespaces/{namespace}/leases"),
+            body=manifest,
+            expected=(200, 201),
+        )
+
+    def replace_lease(self, name, manifest):
+        return self._request(
+            "PUT",
+            self._ns_path(f"/apis/coordination.k8s.io/v1/namespaces/{{namespace}}/leases/{name}"),
+            body=manifest,
+            expected=(200,),
+        )
@@ -0,0 +1,159 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from .k8s_client import K8sApiError
+
+_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+def _format_time(value):
+    return value.strftime(_TIME_FORMAT)
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    for fmt in (_TIME_FORMAT, "%Y-%m-%dT%H:%M:%SZ"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+class LeaseElector:
+    """
+    Leader election on a coordination.k8s.io Lease, so cluster-wide background
+    loops run in a single process across gunicorn workers and CTFd replicas.
+    """
+
+    def __init__(self, lease_name="ctfd-podspawner", lease_duration=180):
+        self.lease_name = lease_name
+        self.lease_duration = lease_duration
+        self._identity = None
+        self._identity_pid = None
+        self._lock = threading.Lock()
+        self._leader_until = 0.0
+        self._checked_at = 0.0
+        # Raised again by cached calls until the next check, so callers see
+        # the same outcome for the whole interval.
+        self._error = None
+
+    @property
+    def identity(self):
+        # Computed after fork so every gunicorn worker gets its own identity.
+        if self._identity is None or self._identity_pid != os.getpid():
+            self._identity_pid = os.getpid()
+            self._identity = f"{socket.gethostname()}-{self._identity_pid}-{uuid.uuid4().hex[:8]}"
+        return self._identity
+
+    def _manifest(self, client, spec, metadata=None):
+        return {
+            "apiVersion": "coordination.k8s.io/v1",
+            "kind": "Lease",
+            "metadata": {
+                **(metadata or {}),
+                "name": self.lease_name,
+                "namespace": client.namespace,
+            },
+            "spec": spec,
+        }
+
+    def is_leader(self, client):
+        """
+        Acquire or renew the lease when due and report whether this process holds it.
+        Renewal happens at most every third of the lease duration.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at < self.lease_duration / 3:
+                if self._error is not None:
+                    raise self._error
+                return now < self._leader_until
+            self._checked_at = now
+            self._error = None
+            try:
+                leader = self._try_acquire_or_renew(client)
+            except K8sApiError as exc:
+                if exc.status != 409:
+                    self._error = exc
+                    self._leader_until = 0.0
+                    raise
+                leader = False
+            except OSError as exc:
+                self._error = exc
+                self._leader_until = 0.0
+                raise
+            self._leader_until = now + self.lease_duration if leader else 0.0
+            return leader
+
+    def _try_acquire_or_renew(self, client):
+        now = datetime.utcnow()
+        status, lease = client.get_lease(self.lease_name)
+        if status == 404:
+            client.create_lease(
+                self._manifest(
+                    client,
+                    {
+                        "holderIdentity": self.identity,
+                        "leaseDurationSeconds": self.lease_duration,
+                        "acquireTime": _format_time(now),
+                        "renewTime": _format_time(now),
+                        "leaseTransitions": 0,
+                    },
+                )
+            )
+            return True
+
+        spec = lease.get("spec") or {}
+        holder = spec.get("holderIdentity")
+        renew_time = _parse_time(spec.get("renewTime"))
+        duration = spec.get("leaseDurationSeconds") or self.lease_duration
+        expired = renew_time is None or renew_time + timedelta(seconds=duration) < now
+        if holder and holder != self.identity and not expired:
+            return False
+
+        new_spec = dict(spec)
+        if holder != self.identity:
+            new_spec["holderIdentity"] = self.identity
+            new_spec["acquireTime"] = _format_time(now)
+            new_spec["leaseTransitions"] = (spec.get("leaseTransitions") or 0) + 1
+        new_spec["leaseDurationSeconds"] = self.lease_duration
+        new_spec["renewTime"] = _format_time(now)
+        # metadata.resourceVersion turns a lost race into a 409.
+        client.replace_lease(
+            self.lease_name, self._manifest(client, new_spec, lease.get("metadata"))
+        )
+        return True
+
+    def release(self, client):
+        """
+        Give up the lease on shutdown so another process takes over right away.
+        """
+        with self._lock:
+            if time.monotonic() >= self._leader_until:
+                return
+            self._leader_until = 0.0
+            self._checked_at = 0.0
+            self._error = None
+            status, lease = client.get_lease(self.lease_name)
+            if status == 404:
+                return
+            spec = dict(lease.get("spec") or {})
+            if spec.get("holderIdentity") != self.identity:
+                return
+            spec["holderIdentity"] = None
+            spec["renewTime"] = None
+            try:
+                client.replace_lease(
+                    self.lease_name, self._manifest(client, spec, lease.get("metadata"))
+                )
+            except K8sApiError:
+                pass
+
+
+leader_elector = LeaseElector()
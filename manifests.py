@@ -0,0 +1,149 @@
+import json
+import re
+from functools import lru_cache
+
+_PLACEHOLDER_RE = re.compile(r'"__podspawner_(\w+)__"')
+
+
+def _slot(field):
+    return f"__podspawner_{field}__"
+
+
+class CompiledManifest:
+    """
+    A manifest serialized once, with named slots for the per-instance fields.
+    ``render`` only encodes the slot values and joins the precomputed pieces.
+    """
+
+    def __init__(self, manifest):
+        parts = _PLACEHOLDER_RE.split(json.dumps(manifest, separators=(",", ":")))
+        # split() alternates literal text and slot names: [text, slot, text, ...].
+        self._literals = parts[0::2]
+        self._slots = parts[1::2]
+
+    def render(self, **values):
+        pieces = [self._literals[0]]
+        for slot, literal in zip(self._slots, self._literals[1:]):
+            pieces.append(json.dumps(values[slot], separators=(",", ":")))
+            pieces.append(literal)
+        return "".join(pieces).encode()
+
+
+@lru_cache(maxsize=256)
+def deployment_template(namespace, image, container_port, resources_key, protocol):
+    return CompiledManifest(
+        {
+            "apiVersion": "apps/v1",
+            "kind": "Deployment",
+            "metadata": {
+                "name": _slot("name"),
+                "namespace": namespace,
+                "labels": _slot("labels"),
+            },
+            "spec": {
+                "replicas": 1,
+                "selector": {"matchLabels": _slot("pod_labels")},
+                "template": {
+                    "metadata": {
+                        "labels": _slot("pod_labels"),
+                    },
+                    "spec": {
+                        "automountServiceAccountToken": False,
+                        "hostNetwork": False,
+                        "hostPID": False,
+                        "hostIPC": False,
+                        "enableServiceLinks": False,
+                        "dnsPolicy": "ClusterFirst",
+                        "restartPolicy": "Always",
+                        "terminationGracePeriodSeconds": 10,
+                        "securityContext": {
+                            "runAsNonRoot": True,
+                            "seccompProfile": {"type": "RuntimeDefault"},
+                        },
+                        "containers": [
+                            {
+                                "name": "challenge",
+                                "image": image,
+                                "imagePullPolicy": "IfNotPresent",
+                                "ports": [
+                                    {
+                                        "containerPort": container_port,
+                                        "name": "challenge",
+                                        "protocol": protocol,
+                                    }
+                                ],
+                                "resources": json.loads(resources_key),
+                                "securityContext": {
+                                    "runAsNonRoot": True,
+                                    "allowPrivilegeEscalation": False,
+                                    "privileged": False,
+                                    "capabilities": {"drop": ["ALL"]},
+                                    "seccompProfile": {"type": "RuntimeDefault"},
+                                },
+                            }
+                        ],
+                    },
+                },
+            },
+        }
+    )
+
+
+@lru_cache(maxsize=256)
+def service_template(namespace, port, target_port, protocol):
+    return CompiledManifest(
+        {
+            "apiVersion": "v1",
+            "kind": "Service",
+            "metadata": {"name": _slot("name"), "namespace": namespace, "labels": _slot("labels")},
+            "spec": {
+                "type": "ClusterIP",
+                "selector": _slot("selector"),
+                "ports": [
+                    {
+                        "name": "challenge",
+                        "port": port,
+                        "targetPort": target_port,
+                        "protocol": protocol,
+                    }
+                ],
+            },
+        }
+    )
+
+
+@lru_cache(maxsize=256)
+def http_route_template(namespace, service_port, gateway_name, gateway_namespace):
+    return CompiledManifest(
+        {
+            "apiVersion": "gateway.networking.k8s.io/v1beta1",
+            "kind": "HTTPRoute",
+            "metadata": {"name": _slot("name"), "namespace": namespace, "labels": _slot("labels")},
+            "spec": {
+                "parentRefs": [
+                    {
+                        "name": gateway_name,
+                        **({"namespace": gateway_namespace} if gateway_namespace else {}),
+                    }
+                ],
+                "hostnames": [_slot("hostname")],
+                "rules": [
+                    {
+                        "backendRefs": [
+                            {
+                                "name": _slot("service_name"),
+                                "port": service_port,
+                            }
+                        ]
+                    }
+                ],
+            },
+        }
+    )
+
+
+def resources_key(resources):
+    """
+    Canonical form of a resources dict, used as the template cache key.
+    """
+    return json.dumps(resources, sort_keys=True)
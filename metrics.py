@@ -0,0 +1,171 @@
+import bisect
+import threading
+
+# Seconds; covers a fast in-cluster GET up to a slow deletecollection.
+API_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Seconds from spawn to READY; image pulls dominate the tail.
+READY_BUCKETS = (1, 2, 5, 10, 20, 30, 60, 120, 300, 600)
+
+_VERBS = {
+    ("GET", True): "get",
+    ("GET", False): "list",
+    ("POST", False): "create",
+    ("PUT", True): "update",
+    ("PATCH", True): "patch",
+    ("DELETE", True): "delete",
+    ("DELETE", False): "deletecollection",
+}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            labelset = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}{labelset} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. ``observe`` bumps a single bucket under a lock;
+    cumulative counts are only built when rendering.
+    """
+
+    def __init__(self, name, help_text, buckets, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, *labels):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][idx] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted(
+                (labels, (list(counts), total))
+                for labels, (counts, total) in self._series.items()
+            )
+        for labels, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            suffix = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{suffix} {_format_value(total)}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+def render_gauge(name, help_text, samples, labelnames=()):
+    """
+    Render a gauge computed at scrape time; ``samples`` is [(label_values, value)].
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+    return lines
+
+
+api_request_seconds = Histogram(
+    "podspawner_k8s_api_request_duration_seconds",
+    "Kubernetes API request latency.",
+    API_BUCKETS,
+    ("verb", "kind", "code"),
+)
+api_errors = Counter(
+    "podspawner_k8s_api_errors_total",
+    "Kubernetes API requests that failed at the transport level or returned >= 400.",
+    ("verb", "kind", "code"),
+)
+api_retries = Counter(
+    "podspawner_k8s_api_retries_total",
+    "Kubernetes API requests resent after throttling or a transient failure.",
+    ("verb", "kind", "reason"),
+)
+instance_ready_seconds = Histogram(
+    "podspawner_instance_ready_seconds",
+    "Time from spawn (PENDING) until the instance was first seen READY.",
+    READY_BUCKETS,
+)
+
+
+def describe_request(method, path):
+    """
+    (verb, kind) for an API path such as /apis/apps/v1/namespaces/ns/deployments/name.
+    """
+    parts = path.split("?", 1)[0].strip("/").split("/")
+    try:
+        rest = parts[parts.index("namespaces") + 2 :]
+    except ValueError:
+        rest = parts[-1:]
+    kind = rest[0] if rest else "unknown"
+    return _VERBS.get((method, len(rest) > 1), method.lower()), kind
+
+
+def observe_api_request(method, path, code, seconds, expected=()):
+    """
+    Record one API call; ``expected`` codes (a 404 on delete) aren't errors.
+    """
+    verb, kind = describe_request(method, path)
+    api_request_seconds.observe(seconds, verb, kind, str(code))
+    if code == "error" or (int(code) >= 400 and int(code) not in expected):
+        api_errors.inc(verb, kind, str(code))
+
+
+def observe_api_retry(method, path, reason):
+    verb, kind = describe_request(method, path)
+    api_retries.inc(verb, kind, reason)
+
+
+def observe_ready(created_at, now):
+    if created_at is not None:
+        instance_ready_seconds.observe(max(0.0, (now - created_at).total_seconds()))
+
+
+def render_registry():
+    lines = []
+    for metric in (api_request_seconds, api_errors, api_retries, instance_ready_seconds):
+        lines.extend(metric.render())
+    return lines
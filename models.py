@@ -8,6 +8,22 @@ STATUS_READY = "READY"
 STATUS_FAILED = "FAILED"
 STATUS_STOPPED = "STOPPED"
 STATUS_EXPIRED = "EXPIRED"
+# Scaled to zero while idle; the Service and HTTPRoute are kept for the wake-up.
+STATUS_SUSPENDED = "SUSPENDED"
+STATUSES = (
+    STATUS_PENDING,
+    STATUS_READY,
+    STATUS_SUSPENDED,
+    STATUS_FAILED,
+    STATUS_STOPPED,
+    STATUS_EXPIRED,
+)
+
+# Who shares an instance of a challenge.
+OWNERSHIP_USER = "user"
+OWNERSHIP_TEAM = "team"
+OWNERSHIP_GLOBAL = "global"
+OWNERSHIPS = (OWNERSHIP_USER, OWNERSHIP_TEAM, OWNERSHIP_GLOBAL)
 
 
 class K8sChallengeConfig(db.Model):
@@ -26,6 +42,9 @@ class K8sChallengeConfig(db.Model):
     protocol = db.Column(db.String(8), default="http", nullable=False)
     allowlist_prefix = db.Column(db.String(256))
     enabled = db.Column(db.Boolean, default=False, nullable=False)
+    warm_pool_size = db.Column(db.Integer, default=0, nullable=False)
+    max_instances = db.Column(db.Integer, default=0, nullable=False)
+    ownership = db.Column(db.String(8), default=OWNERSHIP_USER, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
@@ -48,6 +67,9 @@ class K8sChallengeConfig(db.Model):
             "protocol": self.protocol,
             "allowlist_prefix": self.allowlist_prefix,
             "enabled": self.enabled,
+            "warm_pool_size": self.warm_pool_size,
+            "max_instances": self.max_instances,
+            "ownership": self.ownership,
         }
 
 
@@ -63,10 +85,15 @@ class K8sInstance(db.Model):
     challenge_id = db.Column(
         db.Integer, db.ForeignKey("challenges.id"), nullable=False, index=True
     )
+    # The player who spawned it; team and global instances are shared beyond them.
     user_id = db.Column(
         db.Integer, db.ForeignKey("users.id"), nullable=False, index=True
     )
+    team_id = db.Column(db.Integer, db.ForeignKey("teams.id"), nullable=True)
+    owner_scope = db.Column(db.String(8), default=OWNERSHIP_USER, nullable=False)
     k8s_namespace = db.Column(db.String(64), nullable=False, default="ctf-challenges")
+    # Name of the PODSPAWNER_BACKENDS entry the instance was placed on; NULL is "default".
+    backend = db.Column(db.String(64))
     deployment_name = db.Column(db.String(128), nullable=False)
     service_name = db.Column(db.String(128), nullable=False)
     route_name = db.Column(db.String(128))
@@ -76,13 +103,40 @@ class K8sInstance(db.Model):
     status = db.Column(db.String(16), default=STATUS_PENDING, nullable=False)
     endpoint = db.Column(db.String(256))
     last_error = db.Column(db.Text)
+    # Last time the owner's widget asked about the instance; drives idle suspension.
+    last_seen_at = db.Column(db.DateTime)
+    # Last scale-up from zero; readiness after it isn't a spawn-to-ready sample.
+    woken_at = db.Column(db.DateTime)
 
     challenge = db.relationship("Challenges", backref="k8s_instances")
     user = db.relationship("Users", backref="k8s_instances")
 
     __table_args__ = (
         db.UniqueConstraint("challenge_id", "user_id", "id"),
-        db.Index("idx_k8s_instances_user_challenge", "user_id", "challenge_id"),
+        # Serves "latest instance for (user, challenge)" without a filesort.
+        db.Index(
+            "idx_k8s_instances_user_challenge_created",
+            "user_id",
+            "challenge_id",
+            created_at.desc(),
+        ),
+        db.Index(
+            "idx_k8s_instances_team_challenge_created",
+            "team_id",
+            "challenge_id",
+            created_at.desc(),
+        ),
+        db.Index(
+            "idx_k8s_instances_challenge_created",
+            "challenge_id",
+            created_at.desc(),
+        ),
+        # Admin listing filtered by status, newest first.
+        db.Index(
+            "idx_k8s_instances_status_created",
+            "status",
+            created_at.desc(),
+        ),
     )
 
     def is_expired(self):
@@ -93,9 +147,14 @@ class K8sInstance(db.Model):
             "id": self.id,
             "challenge_id": self.challenge_id,
             "user_id": self.user_id,
+            "team_id": self.team_id,
+            "owner_scope": self.owner_scope,
+            "backend": self.backend,
             "status": self.status,
             "endpoint": self.endpoint,
             "hostname": self.hostname,
             "expires_at": self.expires_at.isoformat() if self.expires_at else None,
             "last_error": self.last_error,
+            "last_seen_at": self.last_seen_at.isoformat() if self.last_seen_at else None,
+            "woken_at": self.woken_at.isoformat() if self.woken_at else None,
         }
@@ -0,0 +1,153 @@
+from .k8s_client import K8sApiError
+
+PREPULL_LABELS = {
+    "app.kubernetes.io/name": "ctfd-podspawner-prepull",
+    "app.kubernetes.io/managed-by": "ctfd-podspawner",
+}
+PREPULL_SELECTOR = ",".join(f"{key}={value}" for key, value in PREPULL_LABELS.items())
+
+# Copied out of the tools image so every challenge image can run it, shell or not.
+_NOOP_PATH = "/prepull/true"
+_WAITING_ERRORS = {"ErrImagePull", "ImagePullBackOff", "InvalidImageName", "ErrImageNeverPull"}
+
+_CONTAINER_SECURITY = {
+    "allowPrivilegeEscalation": False,
+    "privileged": False,
+    "capabilities": {"drop": ["ALL"]},
+    "seccompProfile": {"type": "RuntimeDefault"},
+}
+_CONTAINER_RESOURCES = {
+    "requests": {"cpu": "5m", "memory": "8Mi"},
+    "limits": {"cpu": "50m", "memory": "32Mi"},
+}
+
+
+def _container(name, image, command=None):
+    container = {
+        "name": name,
+        "image": image,
+        "imagePullPolicy": "IfNotPresent",
+        "resources": _CONTAINER_RESOURCES,
+        "securityContext": _CONTAINER_SECURITY,
+        "volumeMounts": [{"name": "prepull-bin", "mountPath": "/prepull"}],
+    }
+    if command:
+        container["command"] = command
+    return container
+
+
+def build_prepull_daemonset(name, namespace, images, tools_image, pause_image):
+    """
+    DaemonSet whose init containers run a no-op binary in each challenge image,
+    so the kubelet on every node pulls them ahead of the first spawn.
+    """
+    init_containers = [_container("tools", tools_image, ["cp", "/bin/true", _NOOP_PATH])]
+    init_containers += [
+        _container(f"pull-{idx}", image, [_NOOP_PATH]) for idx, image in enumerate(images)
+    ]
+    return {
+        "apiVersion": "apps/v1",
+        "kind": "DaemonSet",
+        "metadata": {"name": name, "namespace": namespace, "labels": PREPULL_LABELS},
+        "spec": {
+            "selector": {"matchLabels": PREPULL_LABELS},
+            # Nothing is served from these pods: replace them all at once.
+            "updateStrategy": {"type": "RollingUpdate", "rollingUpdate": {"maxUnavailable": "100%"}},
+            "template": {
+                "metadata": {"labels": PREPULL_LABELS},
+                "spec": {
+                    "automountServiceAccountToken": False,
+                    "enableServiceLinks": False,
+                    "terminationGracePeriodSeconds": 1,
+                    "securityContext": {
+                        "runAsNonRoot": True,
+                        "runAsUser": 65534,
+                        "runAsGroup": 65534,
+                        "seccompProfile": {"type": "RuntimeDefault"},
+                    },
+                    "volumes": [{"name": "prepull-bin", "emptyDir": {}}],
+                    "initContainers": init_containers,
+                    "containers": [_container("pause", pause_image)],
+                },
+            },
+        },
+    }
+
+
+def sync_prepull_daemonset(client, name, images, tools_image, pause_image):
+    """
+    Converge the pre-pull DaemonSet on ``images``; with no images it is removed.
+    """
+    if not images:
+        client.delete_daemonset(name)
+        return
+    client.apply_daemonset(
+        name,
+        build_prepull_daemonset(name, client.namespace, images, tools_image, pause_image),
+    )
+
+
+def _image_state(status):
+    state = (status or {}).get("state") or {}
+    if "running" in state:
+        return "pulled", None
+    if "terminated" in state:
+        terminated = state["terminated"]
+        if terminated.get("exitCode") == 0:
+            return "pulled", None
+        # The image is on the node even though the no-op failed in it.
+        return "pulled", terminated.get("reason") or f"exit code {terminated.get('exitCode')}"
+    reason = (state.get("waiting") or {}).get("reason")
+    if reason in _WAITING_ERRORS:
+        return "error", (state["waiting"].get("message") or reason)
+    return "pending", None
+
+
+def prepull_progress(client, name, images):
+    """
+    Per-node pull state of ``images``. Pods still running an older image list
+    are reported as outdated; the rollout replaces them.
+    """
+    daemonset = client.get_daemonset(name)
+    if daemonset is None:
+        return {"exists": False, "images": list(images), "nodes": []}
+    try:
+        pods, _ = client.list_pods(PREPULL_SELECTOR)
+    except K8sApiError as exc:
+        if exc.status != 403:
+            raise
+        # Pod read access is optional: fall back to the DaemonSet counters.
+        pods = None
+    status = daemonset.get("status") or {}
+    nodes = []
+    for pod in pods or []:
+        spec = pod.get("spec") or {}
+        statuses = {
+            entry.get("name"): entry
+            for entry in (pod.get("status") or {}).get("initContainerStatuses") or []
+        }
+        pulls = []
+        for container in spec.get("initContainers") or []:
+            if not container.get("name", "").startswith("pull-"):
+                continue
+            state, error = _image_state(statuses.get(container["name"]))
+            pulls.append({"image": container.get("image"), "state": state, "error": error})
+        nodes.append(
+            {
+                "node": spec.get("nodeName"),
+                "pod": (pod.get("metadata") or {}).get("name"),
+                "outdated": [pull["image"] for pull in pulls] != list(images),
+                "pulled": sum(1 for pull in pulls if pull["state"] == "pulled"),
+                "total": len(pulls),
+                "images": pulls,
+            }
+        )
+    nodes.sort(key=lambda entry: entry["node"] or "")
+    return {
+        "exists": True,
+        "images": list(images),
+        "desired": status.get("desiredNumberScheduled", 0),
+        "updated": status.get("updatedNumberScheduled", 0),
+        "ready": status.get("numberReady", 0),
+        "nodes": nodes if pods is not None else None,
+    }
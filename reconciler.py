@@ -0,0 +1,159 @@
+from datetime import datetime, timedelta
+
+from CTFd.models import db
+from sqlalchemy import or_
+
+from .backends import DEFAULT_BACKEND, backend_filter
+from .informer import MANAGED_SELECTOR
+from .k8s_client import K8sApiError, parse_deployment_status
+from .metrics import observe_ready
+from .models import (
+    K8sInstance,
+    STATUS_FAILED,
+    STATUS_PENDING,
+    STATUS_READY,
+    STATUS_SUSPENDED,
+)
+from .workers import fan_out
+
+# Instances whose pod should be running; suspended ones are scaled to zero.
+RUNNING_STATUSES = (STATUS_PENDING, STATUS_READY)
+ACTIVE_STATUSES = RUNNING_STATUSES + (STATUS_SUSPENDED,)
+MISSING_DEPLOYMENT_ERROR = "Deployment missing from cluster"
+
+
+def _chunks(values, size):
+    values = list(values)
+    for idx in range(0, len(values), size):
+        yield values[idx : idx + size]
+
+
+def _parse_timestamp(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ")
+    except (TypeError, ValueError):
+        return None
+
+
+def _index_by_instance(items, cutoff):
+    """
+    Group objects by their ctf.instance_id label, skipping objects that are
+    already being deleted or too young to judge.
+    """
+    index = {}
+    for obj in items:
+        metadata = obj.get("metadata") or {}
+        instance_id = (metadata.get("labels") or {}).get("ctf.instance_id")
+        if not instance_id or metadata.get("deletionTimestamp"):
+            continue
+        created = _parse_timestamp(metadata.get("creationTimestamp"))
+        if created is not None and created > cutoff:
+            continue
+        index.setdefault(instance_id, []).append(metadata.get("name"))
+    return index
+
+
+def reconcile_instances(client, grace_seconds=300, batch_size=200, backends=(DEFAULT_BACKEND,)):
+    """
+    Compare the managed objects reachable through ``client`` with the active
+    k8s_instances rows placed on ``backends``, which must be every backend
+    sharing the client's API server and namespace.
+    Objects whose instance is no longer active are deleted, and rows whose
+    Deployment is gone or whose readiness drifted are corrected. Returns a report
+    of what changed.
+    """
+    listed = fan_out(
+        lambda: client.list_deployments(MANAGED_SELECTOR),
+        lambda: client.list_services(MANAGED_SELECTOR),
+        lambda: client.list_http_routes(MANAGED_SELECTOR),
+    )
+    for _, exc in listed:
+        if exc is not None:
+            raise exc
+    deployments, services, routes = (result[0] for result, _ in listed)
+
+    # Rows are read after the LIST: anything listed was created after its row was committed.
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=grace_seconds)
+    rows = (
+        db.session.query(
+            K8sInstance.id,
+            K8sInstance.deployment_name,
+            K8sInstance.status,
+            K8sInstance.created_at,
+            K8sInstance.woken_at,
+        )
+        .filter(
+            K8sInstance.status.in_(ACTIVE_STATUSES),
+            or_(*[backend_filter(K8sInstance.backend, name) for name in backends]),
+        )
+        .all()
+    )
+    active_ids = {row.id for row in rows}
+
+    report = {
+        "orphans_deleted": {"deployments": 0, "services": 0, "httproutes": 0},
+        "marked_failed": 0,
+        "marked_ready": 0,
+        "marked_pending": 0,
+    }
+    kinds = (
+        ("deployments", deployments, client.delete_deployments, client.delete_deployment),
+        ("services", services, client.delete_services, client.delete_service),
+        ("httproutes", routes, client.delete_http_routes, client.delete_http_route),
+    )
+    for kind, items, delete_many, delete_one in kinds:
+        orphans = {
+            instance_id: names
+            for instance_id, names in _index_by_instance(items, cutoff).items()
+            if instance_id not in active_ids
+        }
+        for chunk in _chunks(sorted(orphans), batch_size):
+            try:
+                delete_many(f"ctf.instance_id in ({','.join(chunk)})")
+            except K8sApiError as exc:
+                if exc.status != 405:
+                    raise
+                fan_out(
+                    *[
+                        lambda name=name: delete_one(name)
+                        for instance_id in chunk
+                        for name in orphans[instance_id]
+                    ]
+                )
+            report["orphans_deleted"][kind] += sum(len(orphans[i]) for i in chunk)
+
+    deployment_status = {
+        (obj.get("metadata") or {}).get("name"): parse_deployment_status(obj)
+        for obj in deployments
+    }
+    transitions = {STATUS_FAILED: [], STATUS_READY: [], STATUS_PENDING: []}
+    for row in rows:
+        status = deployment_status.get(row.deployment_name)
+        if status is None:
+            # Leave provisioning time before declaring the Deployment lost.
+            if row.created_at <= cutoff:
+                transitions[STATUS_FAILED].append(row.id)
+            continue
+        if row.status == STATUS_SUSPENDED:
+            continue
+        new_status = STATUS_READY if status["ready"] else STATUS_PENDING
+        if new_status != row.status:
+            transitions[new_status].append(row.id)
+            if new_status == STATUS_READY and not row.woken_at:
+                observe_ready(row.created_at, now)
+
+    for new_status, ids in transitions.items():
+        values = {K8sInstance.status: new_status}
+        if new_status == STATUS_FAILED:
+            values[K8sInstance.last_error] = MISSING_DEPLOYMENT_ERROR
+        for chunk in _chunks(ids, batch_size):
+            K8sInstance.query.filter(
+                K8sInstance.id.in_(chunk),
+                K8sInstance.status.in_(
+                    ACTIVE_STATUSES if new_status == STATUS_FAILED else RUNNING_STATUSES
+                ),
+            ).update(values, synchronize_session=False)
+        report[f"marked_{new_status.lower()}"] += len(ids)
+    db.session.commit()
+    return report
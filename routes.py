@@ -1,17 +1,52 @@
+import hashlib
+import http.client
+import json
+import random
 import re
+import threading
 import time
 import uuid
+from collections import namedtuple
 from datetime import datetime, timedelta
 
-from flask import Blueprint, current_app, jsonify, redirect, render_template, request, url_for
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    stream_with_context,
+    url_for,
+)
+from sqlalchemy import and_, func
 from sqlalchemy.exc import SQLAlchemyError
 
-from CTFd.models import Challenges, db
+from CTFd.models import Challenges, Users, db
+from CTFd.utils.config import is_teams_mode
 from CTFd.utils.decorators import admins_only, authed_only
-from CTFd.utils.user import get_current_user
-
-from .k8s_client import K8sApiError, K8sClient
+from CTFd.utils.user import get_current_user, is_admin
+
+from .admission import admission, parse_cpu, parse_memory
+from .backends import DEFAULT_BACKEND, backend_exclude, backend_filter, placement
+from .config_cache import ConfigEntry, config_cache, snapshot_config
+from .expiry import expiry_scheduler
+from .informer import deployment_informer
+from .k8s_client import (
+    ClusterBusyError,
+    K8sApiError,
+    K8sClient,
+    is_transient,
+    parse_deployment_status,
+)
+from .leader import leader_elector
+from .metrics import observe_ready, render_gauge, render_registry
 from .models import (
+    OWNERSHIP_GLOBAL,
+    OWNERSHIP_TEAM,
+    OWNERSHIP_USER,
+    OWNERSHIPS,
     K8sChallengeConfig,
     K8sInstance,
     STATUS_EXPIRED,
@@ -19,7 +54,13 @@ from .models import (
     STATUS_PENDING,
     STATUS_READY,
     STATUS_STOPPED,
+    STATUS_SUSPENDED,
+    STATUSES,
 )
+from .prepull import prepull_progress, sync_prepull_daemonset
+from .reconciler import reconcile_instances
+from .warm_pool import claim_warm_deployment, reconcile_warm_pools
+from .workers import fan_out, spawn_pool
 
 pod_bp = Blueprint(
     "podspawner",
@@ -41,20 +82,29 @@ def _now():
     return datetime.utcnow()
 
 
-def _get_namespace():
-    return current_app.config.get("PODSPAWNER_NAMESPACE", "ctf-challenges")
+# The backend helpers take a PODSPAWNER_BACKENDS name; None is the default backend.
+
+
+def _get_namespace(backend=None):
+    return placement.get(backend).client_options.get("namespace") or current_app.config.get(
+        "PODSPAWNER_NAMESPACE", "ctf-challenges"
+    )
 
 
-def _get_gateway_name():
-    return current_app.config.get("PODSPAWNER_GATEWAY_NAME", "ctfd-gateway")
+def _get_gateway_name(backend=None):
+    return placement.get(backend).gateway_name or current_app.config.get(
+        "PODSPAWNER_GATEWAY_NAME", "ctfd-gateway"
+    )
 
 
-def _get_gateway_namespace():
-    return current_app.config.get("PODSPAWNER_GATEWAY_NAMESPACE", _get_namespace())
+def _get_gateway_namespace(backend=None):
+    return placement.get(backend).gateway_namespace or current_app.config.get(
+        "PODSPAWNER_GATEWAY_NAMESPACE", _get_namespace(backend)
+    )
 
 
-def _get_base_domain():
-    base = current_app.config.get("PODSPAWNER_BASE_DOMAIN")
+def _get_base_domain(backend=None):
+    base = placement.get(backend).base_domain or current_app.config.get("PODSPAWNER_BASE_DOMAIN")
     if base:
         return base
     server_name = current_app.config.get("SERVER_NAME")
@@ -71,30 +121,77 @@ def _get_base_domain():
         return None
 
 
-def _build_client():
-    return K8sClient(
-        host=current_app.config.get("PODSPAWNER_API_HOST", "kubernetes.default.svc"),
-        namespace=_get_namespace(),
-        token_path=current_app.config.get(
+_client_lock = threading.Lock()
+# Backend name -> (settings key, K8sClient).
+_shared_clients = {}
+
+
+def _client_settings(backend=None):
+    settings = {
+        "host": current_app.config.get("PODSPAWNER_API_HOST", "kubernetes.default.svc"),
+        "namespace": _get_namespace(backend),
+        "token_path": current_app.config.get(
             "PODSPAWNER_TOKEN_PATH",
             "/var/run/secrets/kubernetes.io/serviceaccount/token",
         ),
-        ca_path=current_app.config.get(
+        "ca_path": current_app.config.get(
             "PODSPAWNER_CA_PATH",
             "/var/run/secrets/kubernetes.io/serviceaccount/ca.crt",
         ),
-        timeout=int(current_app.config.get("PODSPAWNER_API_TIMEOUT", 5)),
-    )
-
-
-def _get_client_safe():
+        "timeout": int(current_app.config.get("PODSPAWNER_API_TIMEOUT", 5)),
+        "pool_size": int(current_app.config.get("PODSPAWNER_API_POOL_SIZE", 10)),
+        "max_retries": int(current_app.config.get("PODSPAWNER_API_MAX_RETRIES", 3)),
+        "backoff_base": float(current_app.config.get("PODSPAWNER_API_BACKOFF_BASE", 0.2)),
+        "backoff_max": float(current_app.config.get("PODSPAWNER_API_BACKOFF_MAX", 5)),
+        "retry_budget": float(current_app.config.get("PODSPAWNER_API_RETRY_BUDGET", 10)),
+        "breaker_threshold": int(current_app.config.get("PODSPAWNER_API_BREAKER_THRESHOLD", 5)),
+        "breaker_cooldown": float(current_app.config.get("PODSPAWNER_API_BREAKER_COOLDOWN", 15)),
+    }
+    settings.update(placement.get(backend).client_options)
+    return settings
+
+
+def _build_client(backend=None):
+    # One client per backend and process: it keeps the keep-alive pool and SSL
+    # context and picks up token rotations itself. Rebuilt only if the settings change.
+    name = placement.get(backend).name
+    settings = _client_settings(name)
+    key = tuple(sorted(settings.items()))
+    with _client_lock:
+        cached = _shared_clients.get(name)
+        if cached is None or cached[0] != key:
+            if cached is not None:
+                cached[1].close()
+            cached = _shared_clients[name] = (key, K8sClient(**settings))
+        return cached[1]
+
+
+def _get_client_safe(backend=None):
     try:
-        return _build_client(), None
+        return _build_client(backend), None
     except Exception as exc:
         current_app.logger.exception("Unable to initialize Kubernetes client")
         return None, str(exc)
 
 
+def _cluster_busy_response(retry_after):
+    response = jsonify({"success": False, "message": "Cluster busy, retry shortly"})
+    response.headers["Retry-After"] = str(retry_after)
+    return response, 503
+
+
+def _busy_backends():
+    """
+    Backends whose circuit breaker is open, mapped to their Retry-After.
+    """
+    busy = {}
+    for name in placement.backends:
+        client, _ = _get_client_safe(name)
+        if client and client.breaker.is_open():
+            busy[name] = client.breaker.retry_after()
+    return busy
+
+
 def _image_allowed(image, allowlist_prefix=None):
     prefix = allowlist_prefix or current_app.config.get("PODSPAWNER_IMAGE_PREFIX")
     if prefix:
@@ -113,9 +210,9 @@ def _sanitize_name(value):
     return re.sub(r"[^a-z0-9-]", "", value.lower())
 
 
-def _build_resource_name(kind, challenge_id, user_id, instance_id):
+def _build_resource_name(kind, challenge_id, owner, instance_id):
     short_id = instance_id.split("-")[0]
-    base = f"{kind}-chal{challenge_id}-u{user_id}-{short_id}"
+    base = f"{kind}-chal{challenge_id}-{_owner_tag(owner)}-{short_id}"
     return _sanitize_name(base)[:63]
 
 
@@ -170,19 +267,92 @@ def _validate_config(config: K8sChallengeConfig):
         return False, "Protocol must be http or https"
     if not _image_allowed(config.image, config.allowlist_prefix):
         return False, "Image not allowed by allowlist prefix"
+    try:
+        for value in (config.cpu_request, config.cpu_limit):
+            parse_cpu(value)
+        for value in (config.mem_request, config.mem_limit):
+            parse_memory(value)
+    except ValueError as exc:
+        return False, str(exc)
     return True, None
 
 
+def _instance_cost(config):
+    try:
+        return parse_cpu(config.cpu_request), parse_memory(config.mem_request)
+    except ValueError:
+        return 0, 0
+
+
+def _sync_admission():
+    """
+    Rebuild the admission and backend placement counters from the active rows
+    when they are due.
+    """
+    if not admission.needs_resync():
+        return
+    configs = {cfg.challenge_id: cfg for cfg in K8sChallengeConfig.query.all()}
+    rows = (
+        db.session.query(
+            K8sInstance.challenge_id,
+            K8sInstance.user_id,
+            Users.team_id,
+            K8sInstance.backend,
+            func.count(K8sInstance.id),
+        )
+        .outerjoin(Users, Users.id == K8sInstance.user_id)
+        .filter(
+            # Suspended instances keep their slot so waking them is never refused.
+            K8sInstance.status.in_([STATUS_PENDING, STATUS_READY, STATUS_SUSPENDED]),
+            K8sInstance.expires_at > _now(),
+        )
+        .group_by(
+            K8sInstance.challenge_id, K8sInstance.user_id, Users.team_id, K8sInstance.backend
+        )
+        .all()
+    )
+    usage = []
+    backend_usage = []
+    for challenge_id, user_id, team_id, backend, count in rows:
+        cfg = configs.get(challenge_id)
+        cost = _instance_cost(cfg) if cfg else (0, 0)
+        usage.append((challenge_id, user_id, team_id, count, cost))
+        backend_usage.append((backend, count, cost))
+    # Warm pool pods hold capacity too; they live on the default backend.
+    reserved_cpu = reserved_memory = 0
+    for cfg in configs.values():
+        if cfg.enabled and cfg.warm_pool_size:
+            cpu_m, memory = _instance_cost(cfg)
+            reserved_cpu += cpu_m * cfg.warm_pool_size
+            reserved_memory += memory * cfg.warm_pool_size
+    admission.load(usage, reserved=(reserved_cpu, reserved_memory))
+    placement.load(backend_usage, reserved=(reserved_cpu, reserved_memory))
+
+
+def _load_config_entry(challenge_id):
+    config = K8sChallengeConfig.query.filter_by(challenge_id=challenge_id).first()
+    if config:
+        ok, error = _validate_config(config)
+        return ConfigEntry(
+            challenge_exists=True, config=snapshot_config(config), ok=ok, error=error
+        )
+    exists = Challenges.query.filter_by(id=challenge_id).first() is not None
+    return ConfigEntry(challenge_exists=exists, config=None, ok=False, error=None)
+
+
+def _get_config_entry(challenge_id):
+    return config_cache.get(challenge_id, _load_config_entry)
+
+
 @admin_bp.route("/", methods=["GET"])
 @admins_only
 def admin_index():
-    challenges = Challenges.query.all()
-    configs = {cfg.challenge_id: cfg for cfg in K8sChallengeConfig.query.all()}
+    # Configs and instances are loaded page by page from the JSON API below.
     return render_template(
         "admin/podspawner.html",
-        challenges=challenges,
-        configs=configs,
         namespace=_get_namespace(),
+        prepull_enabled=_prepull_settings()[0],
+        statuses=STATUSES,
     )
 
 
@@ -203,16 +373,407 @@ def admin_save_config(challenge_id):
     config.allowlist_prefix = (data.get("allowlist_prefix") or "").strip() or None
     config.enabled = str(data.get("enabled", "")).lower() in {"1", "true", "on", "yes"}
     config.protocol = (data.get("protocol") or "http").lower()
+    config.warm_pool_size = max(0, int(data.get("warm_pool_size", 0) or 0))
+    config.max_instances = max(0, int(data.get("max_instances", 0) or 0))
+    ownership = (data.get("ownership") or OWNERSHIP_USER).lower()
+    config.ownership = ownership if ownership in OWNERSHIPS else OWNERSHIP_USER
     db.session.add(config)
     db.session.commit()
+    config_cache.invalidate()
+    try:
+        sync_prepull_images()
+    except Exception as exc:
+        # The reconcile loop retries; saving the config must not fail on it.
+        current_app.logger.warning("Pre-pull DaemonSet update failed: %s", exc)
     if request.is_json:
         return jsonify({"success": True, "config": config.to_dict()})
     return redirect(url_for("podspawner_admin.admin_index"))
 
 
-def _get_latest_instance(challenge_id, user_id):
+def _prepull_settings():
+    config = current_app.config
+    return (
+        bool(config.get("PODSPAWNER_PREPULL_ENABLED", True)),
+        config.get("PODSPAWNER_PREPULL_NAME", "ctfd-podspawner-prepull"),
+        config.get("PODSPAWNER_PREPULL_TOOLS_IMAGE", "busybox:1.36"),
+        config.get("PODSPAWNER_PREPULL_PAUSE_IMAGE", "registry.k8s.io/pause:3.9"),
+    )
+
+
+def _prepull_images():
+    configs = K8sChallengeConfig.query.filter_by(enabled=True).all()
+    return sorted({cfg.image for cfg in configs if cfg.image and _validate_config(cfg)[0]})
+
+
+def sync_prepull_images():
+    """
+    Point the pre-pull DaemonSet of every backend at the images of the enabled
+    challenges. Returns the image list, or None when pre-pulling is disabled.
+    The first API error is raised once all backends have been tried.
+    """
+    enabled, name, tools_image, pause_image = _prepull_settings()
+    if not enabled:
+        return None
+    images = _prepull_images()
+    failure = None
+    for backend in placement.backends:
+        client, client_error = _get_client_safe(backend)
+        if not client:
+            current_app.logger.error("Pre-pull sync of %s skipped: %s", backend, client_error)
+            continue
+        try:
+            sync_prepull_daemonset(client, name, images, tools_image, pause_image)
+        except (K8sApiError, OSError) as exc:
+            failure = failure or exc
+    if failure is not None:
+        raise failure
+    return images
+
+
+@admin_bp.route("/prepull", methods=["GET"])
+@admins_only
+def admin_prepull_status():
+    enabled, name, _, _ = _prepull_settings()
+    if not enabled:
+        return jsonify({"success": True, "enabled": False})
+    images = _prepull_images()
+    backends = {}
+    for backend in placement.backends:
+        client, client_error = _get_client_safe(backend)
+        if not client:
+            backends[backend] = {"error": client_error}
+            continue
+        try:
+            backends[backend] = prepull_progress(client, name, images)
+        except (K8sApiError, OSError) as exc:
+            # One unreachable backend must not hide the progress of the others.
+            backends[backend] = {"error": str(exc)}
+    return jsonify({"success": True, "enabled": True, "backends": backends})
+
+
+@admin_bp.route("/prepull/sync", methods=["POST"])
+@admins_only
+def admin_prepull_sync():
+    try:
+        images = sync_prepull_images()
+    except (K8sApiError, OSError) as exc:
+        if request.is_json:
+            return jsonify({"success": False, "message": str(exc)}), 502
+        current_app.logger.warning("Pre-pull DaemonSet update failed: %s", exc)
+        images = None
+    if request.is_json:
+        return jsonify({"success": True, "images": images})
+    return redirect(url_for("podspawner_admin.admin_index"))
+
+
+def _int_arg(name):
+    value = request.args.get(name)
+    return int(value) if value not in (None, "") else None
+
+
+def _page_args():
+    """
+    (page, per_page) from the query string; raises ValueError on bad input.
+    """
+    limit = int(current_app.config.get("PODSPAWNER_ADMIN_PAGE_LIMIT", 200))
+    page = _int_arg("page") or 1
+    per_page = _int_arg("per_page") or 50
+    if page < 1 or per_page < 1:
+        raise ValueError("page and per_page must be positive")
+    return page, min(per_page, limit)
+
+
+def _page_meta(page, per_page, total):
+    return {
+        "page": page,
+        "per_page": per_page,
+        "total": total,
+        "pages": (total + per_page - 1) // per_page,
+    }
+
+
+def _instance_filters():
+    """
+    Criteria from ?status=&challenge_id=&user_id=&team_id=&backend=&min_age=&max_age=,
+    returned as (status criteria, other criteria) so counts can ignore the status.
+    """
+    status_criteria = []
+    statuses = [part for part in (request.args.get("status") or "").split(",") if part]
+    if statuses:
+        if not set(statuses) <= set(STATUSES):
+            raise ValueError("Unknown status")
+        status_criteria.append(K8sInstance.status.in_(statuses))
+    criteria = []
+    for name, column in (
+        ("challenge_id", K8sInstance.challenge_id),
+        ("user_id", K8sInstance.user_id),
+        ("team_id", K8sInstance.team_id),
+    ):
+        value = _int_arg(name)
+        if value is not None:
+            criteria.append(column == value)
+    if request.args.get("backend"):
+        criteria.append(backend_filter(K8sInstance.backend, request.args["backend"]))
+    now = _now()
+    min_age = _int_arg("min_age")
+    if min_age is not None:
+        criteria.append(K8sInstance.created_at <= now - timedelta(seconds=min_age))
+    max_age = _int_arg("max_age")
+    if max_age is not None:
+        criteria.append(K8sInstance.created_at >= now - timedelta(seconds=max_age))
+    return status_criteria, criteria
+
+
+@admin_bp.route("/api/instances", methods=["GET"])
+@admins_only
+def admin_api_instances():
+    """
+    One page of instances, newest first, with the per-status counts of the
+    same filter (status excluded).
+    """
+    try:
+        page, per_page = _page_args()
+        status_criteria, criteria = _instance_filters()
+    except ValueError as exc:
+        return jsonify({"success": False, "message": str(exc)}), 400
+    rows = (
+        db.session.query(K8sInstance, Challenges.name, Users.name)
+        .outerjoin(Challenges, Challenges.id == K8sInstance.challenge_id)
+        .outerjoin(Users, Users.id == K8sInstance.user_id)
+        .filter(*status_criteria, *criteria)
+        .order_by(K8sInstance.created_at.desc(), K8sInstance.id)
+        .offset((page - 1) * per_page)
+        .limit(per_page)
+        .all()
+    )
+    total = (
+        db.session.query(func.count(K8sInstance.id))
+        .filter(*status_criteria, *criteria)
+        .scalar()
+    )
+    counts = dict(
+        db.session.query(K8sInstance.status, func.count(K8sInstance.id))
+        .filter(*criteria)
+        .group_by(K8sInstance.status)
+        .all()
+    )
+    instances = [
+        dict(
+            inst.to_dict(),
+            created_at=inst.created_at.isoformat() if inst.created_at else None,
+            challenge_name=challenge_name,
+            user_name=user_name,
+        )
+        for inst, challenge_name, user_name in rows
+    ]
+    return jsonify(
+        {
+            "success": True,
+            "instances": instances,
+            "counts": counts,
+            "meta": _page_meta(page, per_page, total),
+        }
+    )
+
+
+@admin_bp.route("/api/configs", methods=["GET"])
+@admins_only
+def admin_api_configs():
+    """
+    One page of challenges with their config and instance counts per status.
+    ``?q=`` filters on the challenge name.
+    """
+    try:
+        page, per_page = _page_args()
+    except ValueError as exc:
+        return jsonify({"success": False, "message": str(exc)}), 400
+    criteria = []
+    if request.args.get("q"):
+        criteria.append(Challenges.name.ilike(f"%{request.args['q']}%"))
+    rows = (
+        db.session.query(Challenges.id, Challenges.name, Challenges.category, K8sChallengeConfig)
+        .outerjoin(K8sChallengeConfig, K8sChallengeConfig.challenge_id == Challenges.id)
+        .filter(*criteria)
+        .order_by(Challenges.id)
+        .offset((page - 1) * per_page)
+        .limit(per_page)
+        .all()
+    )
+    total = db.session.query(func.count(Challenges.id)).filter(*criteria).scalar()
+    counts = {}
+    if rows:
+        for challenge_id, status, count in (
+            db.session.query(
+                K8sInstance.challenge_id, K8sInstance.status, func.count(K8sInstance.id)
+            )
+            .filter(K8sInstance.challenge_id.in_([row[0] for row in rows]))
+            .group_by(K8sInstance.challenge_id, K8sInstance.status)
+        ):
+            counts.setdefault(challenge_id, {})[status] = count
+    configs = [
+        {
+            "challenge_id": challenge_id,
+            "name": name,
+            "category": category,
+            "config": config.to_dict() if config else None,
+            "instances": counts.get(challenge_id, {}),
+        }
+        for challenge_id, name, category, config in rows
+    ]
+    return jsonify(
+        {"success": True, "configs": configs, "meta": _page_meta(page, per_page, total)}
+    )
+
+
+def _bulk_instance_ids():
+    data = request.get_json(silent=True) or {}
+    ids = data.get("ids")
+    limit = _cleanup_settings()[1]
+    if not isinstance(ids, list) or not ids or len(ids) > limit:
+        raise ValueError(f"ids must be a list of 1 to {limit} instance ids")
+    return [str(instance_id) for instance_id in ids], data
+
+
+@admin_bp.route("/api/instances/stop", methods=["POST"])
+@admins_only
+def admin_api_stop_instances():
+    """
+    Stop many instances with one deletecollection per kind and backend.
+    Instances whose backend is unreachable or busy are left running and
+    reported under ``failed``.
+    """
+    try:
+        ids, _ = _bulk_instance_ids()
+    except ValueError as exc:
+        return jsonify({"success": False, "message": str(exc)}), 400
+    rows = (
+        db.session.query(
+            K8sInstance.id,
+            K8sInstance.deployment_name,
+            K8sInstance.service_name,
+            K8sInstance.route_name,
+            K8sInstance.backend,
+        )
+        .filter(
+            K8sInstance.id.in_(ids),
+            K8sInstance.status.notin_([STATUS_EXPIRED, STATUS_STOPPED]),
+        )
+        .all()
+    )
+    clients = _clients_for(rows, "Bulk stop")
+    stopped, failed = [], []
+    for backend, group in _group_by_backend(rows).items():
+        group_ids = [row.id for row in group]
+        if backend not in clients:
+            failed.extend(group_ids)
+            continue
+        values = {K8sInstance.status: STATUS_STOPPED, K8sInstance.expires_at: _now()}
+        try:
+            _delete_instances_bulk(clients[backend], group)
+        except Exception as exc:
+            if is_transient(exc):
+                failed.extend(group_ids)
+                continue
+            values[K8sInstance.last_error] = str(exc)
+        K8sInstance.query.filter(
+            K8sInstance.id.in_(group_ids),
+            K8sInstance.status.notin_([STATUS_EXPIRED, STATUS_STOPPED]),
+        ).update(values, synchronize_session=False)
+        db.session.commit()
+        stopped.extend(group_ids)
+    for instance_id in stopped:
+        expiry_scheduler.cancel(instance_id)
+    if stopped:
+        admission.invalidate()
+    return jsonify({"success": True, "stopped": stopped, "failed": failed})
+
+
+@admin_bp.route("/api/instances/extend", methods=["POST"])
+@admins_only
+def admin_api_extend_instances():
+    """
+    Push back the expiry of active instances by ``seconds``. Instances already
+    past their expiry are being torn down and are left alone.
+    """
+    try:
+        ids, data = _bulk_instance_ids()
+        seconds = int(data.get("seconds") or 0)
+    except (TypeError, ValueError) as exc:
+        return jsonify({"success": False, "message": str(exc)}), 400
+    max_extend = int(current_app.config.get("PODSPAWNER_ADMIN_MAX_EXTEND", 86400))
+    if not 0 < seconds <= max_extend:
+        return (
+            jsonify({"success": False, "message": f"seconds must be between 1 and {max_extend}"}),
+            400,
+        )
+    now = _now()
+    instances = K8sInstance.query.filter(
+        K8sInstance.id.in_(ids),
+        K8sInstance.status.in_([STATUS_PENDING, STATUS_READY, STATUS_SUSPENDED]),
+        K8sInstance.expires_at > now,
+    ).all()
+    for inst in instances:
+        inst.expires_at += timedelta(seconds=seconds)
+    db.session.commit()
+    for inst in instances:
+        expiry_scheduler.schedule(inst.id, inst.expires_at)
+    return jsonify(
+        {
+            "success": True,
+            "instances": [
+                {"id": inst.id, "expires_at": inst.expires_at.isoformat()} for inst in instances
+            ],
+        }
+    )
+
+
+InstanceOwner = namedtuple("InstanceOwner", "scope user_id team_id")
+
+
+def _resolve_owner(config, user):
+    """
+    Who an instance of this challenge belongs to under the config's ownership
+    mode. Team ownership falls back to the player outside team mode; returns
+    None for a player without a team in team mode.
+    """
+    scope = getattr(config, "ownership", None) or OWNERSHIP_USER
+    if scope == OWNERSHIP_GLOBAL:
+        return InstanceOwner(OWNERSHIP_GLOBAL, None, None)
+    if scope == OWNERSHIP_TEAM and is_teams_mode():
+        team_id = getattr(user, "team_id", None)
+        if team_id is None:
+            return None
+        return InstanceOwner(OWNERSHIP_TEAM, None, team_id)
+    return InstanceOwner(OWNERSHIP_USER, user.id, None)
+
+
+def _current_owner(challenge_id, user):
+    return _resolve_owner(_get_config_entry(challenge_id).config, user)
+
+
+def _owner_tag(owner):
+    if owner.scope == OWNERSHIP_GLOBAL:
+        return "all"
+    if owner.scope == OWNERSHIP_TEAM:
+        return f"t{owner.team_id}"
+    return f"u{owner.user_id}"
+
+
+def _owner_filter(owner):
+    if owner.scope == OWNERSHIP_GLOBAL:
+        return [K8sInstance.owner_scope == OWNERSHIP_GLOBAL]
+    if owner.scope == OWNERSHIP_TEAM:
+        return [K8sInstance.team_id == owner.team_id, K8sInstance.owner_scope == OWNERSHIP_TEAM]
+    return [K8sInstance.user_id == owner.user_id, K8sInstance.owner_scope == OWNERSHIP_USER]
+
+
+def _no_team_response():
+    return jsonify({"success": False, "message": "Join a team to use this challenge"}), 403
+
+
+def _get_latest_instance(challenge_id, owner):
     inst = (
-        K8sInstance.query.filter_by(challenge_id=challenge_id, user_id=user_id)
+        K8sInstance.query.filter(K8sInstance.challenge_id == challenge_id, *_owner_filter(owner))
         .order_by(K8sInstance.created_at.desc())
         .first()
     )
@@ -224,8 +785,71 @@ def _get_latest_instance(challenge_id, user_id):
     return inst
 
 
-def _get_active_instance(challenge_id, user_id):
-    inst = _get_latest_instance(challenge_id, user_id)
+def _get_latest_instances(owners):
+    """
+    Latest instance per challenge, where ``owners`` maps challenge id to its
+    InstanceOwner. One grouped query per distinct owner (at most three).
+    Returns a dict keyed by challenge id.
+    """
+    by_owner = {}
+    for challenge_id, owner in owners.items():
+        by_owner.setdefault(owner, []).append(challenge_id)
+    now = _now()
+    instances = {}
+    expired = False
+    for owner, challenge_ids in by_owner.items():
+        criteria = _owner_filter(owner)
+        latest = (
+            db.session.query(
+                K8sInstance.challenge_id,
+                func.max(K8sInstance.created_at).label("created_at"),
+            )
+            .filter(K8sInstance.challenge_id.in_(challenge_ids), *criteria)
+            .group_by(K8sInstance.challenge_id)
+            .subquery()
+        )
+        rows = (
+            K8sInstance.query.join(
+                latest,
+                and_(
+                    K8sInstance.challenge_id == latest.c.challenge_id,
+                    K8sInstance.created_at == latest.c.created_at,
+                ),
+            )
+            .filter(*criteria)
+            .all()
+        )
+        for inst in rows:
+            if inst.expires_at and inst.expires_at <= now:
+                if inst.status not in {STATUS_STOPPED, STATUS_EXPIRED}:
+                    inst.status = STATUS_EXPIRED
+                    db.session.add(inst)
+                    expired = True
+            instances[inst.challenge_id] = inst
+    if expired:
+        db.session.commit()
+    return instances
+
+
+def _on_default_backend(inst):
+    return (inst.backend or DEFAULT_BACKEND) == DEFAULT_BACKEND
+
+
+def _cached_status(inst):
+    # The informer only watches the default backend.
+    if not _on_default_backend(inst):
+        return None
+    return deployment_informer.get(inst.deployment_name)
+
+
+def _group_by_backend(rows):
+    groups = {}
+    for row in rows:
+        groups.setdefault(row.backend or DEFAULT_BACKEND, []).append(row)
+    return groups
+
+
+def _active_or_none(inst):
     if not inst:
         return None
     if inst.status in {STATUS_STOPPED, STATUS_EXPIRED}:
@@ -235,117 +859,216 @@ def _get_active_instance(challenge_id, user_id):
     return inst
 
 
-def _enforce_rate_limit(challenge_id, user_id):
-    window = timedelta(seconds=_rate_limit_seconds())
-    latest = (
-        K8sInstance.query.filter_by(challenge_id=challenge_id, user_id=user_id)
-        .order_by(K8sInstance.created_at.desc())
-        .first()
-    )
+def _get_active_instance(challenge_id, owner):
+    return _active_or_none(_get_latest_instance(challenge_id, owner))
+
+
+def _is_rate_limited(latest):
     if not latest:
         return False
+    window = timedelta(seconds=_rate_limit_seconds())
     return _now() - latest.created_at < window
 
 
-@pod_bp.route("/spawn/<int:challenge_id>", methods=["POST"])
-@authed_only
-def spawn_instance(challenge_id):
-    user = get_current_user()
-    challenge = Challenges.query.filter_by(id=challenge_id).first()
-    if not challenge:
-        return jsonify({"success": False, "message": "Challenge not found"}), 404
-
-    if _enforce_rate_limit(challenge_id, user.id):
-        return jsonify({"success": False, "message": "Too many requests"}), 429
-
-    config = K8sChallengeConfig.query.filter_by(challenge_id=challenge_id).first()
-    if not config:
-        return jsonify({"success": False, "message": "Challenge not configured"}), 400
-
-    ok, error = _validate_config(config)
-    if not ok:
-        return jsonify({"success": False, "message": error}), 400
-
-    active = _get_active_instance(challenge_id, user.id)
-    if active:
-        return jsonify({"success": True, "instance": _serialize_instance(active)})
-
-    instance_id = str(uuid.uuid4())
-    deployment_name = _build_resource_name("deploy", challenge_id, user.id, instance_id)
-    service_name = _build_resource_name("svc", challenge_id, user.id, instance_id)
-    route_name = _build_resource_name("route", challenge_id, user.id, instance_id)
-    expires_at = _now() + timedelta(seconds=config.ttl_seconds)
-    base_domain = _get_base_domain()
-    hostname = f"{service_name}.{base_domain}" if base_domain else None
-
+def _build_labels(challenge_id, user_id, instance_id, owner_scope=OWNERSHIP_USER, team_id=None):
     labels = {
         "ctf.managed": "true",
-        "ctf.user_id": str(user.id),
+        "ctf.user_id": str(user_id),
         "ctf.challenge_id": str(challenge_id),
         "ctf.instance_id": instance_id,
+        "ctf.owner": owner_scope,
     }
+    if team_id is not None:
+        labels["ctf.team_id"] = str(team_id)
+    return labels
+
+
+def _raise_fan_out_errors(outcomes):
+    """
+    Raise the failures collected by fan_out, folding several K8s errors into one.
+    """
+    errors = [exc for _, exc in outcomes if exc is not None]
+    if not errors:
+        return
+    for exc in errors:
+        if not isinstance(exc, K8sApiError):
+            raise exc
+    if len(errors) == 1 or all(isinstance(exc, ClusterBusyError) for exc in errors):
+        # Callers tell "nothing was sent" apart from a failure by the type.
+        raise errors[0]
+    raise K8sApiError(
+        errors[0].status,
+        "; ".join(str(exc) for exc in errors),
+        {"errors": [exc.payload for exc in errors]},
+    )
 
-    instance = K8sInstance(
-        id=instance_id,
-        challenge_id=challenge_id,
-        user_id=user.id,
-        k8s_namespace=_get_namespace(),
-        deployment_name=deployment_name,
-        service_name=service_name,
-        route_name=route_name,
-        hostname=hostname,
-        created_at=_now(),
-        expires_at=expires_at,
-        status=STATUS_PENDING,
+
+def _delete_instance_resources(client, service_name, deployment_name, route_name):
+    calls = [
+        lambda: client.delete_service(service_name),
+        lambda: client.delete_deployment(deployment_name),
+    ]
+    if route_name:
+        calls.append(lambda: client.delete_http_route(route_name))
+    outcomes = fan_out(*calls)
+    # Route deletion stays best-effort.
+    _raise_fan_out_errors(outcomes[:2])
+
+
+# Provisioning jobs queued or running in this process, so ?wait= can block on them.
+_provisioning_lock = threading.Lock()
+_provisioning = {}
+
+
+def _provision_instance(app, instance_id):
+    """
+    Create the Kubernetes objects for a PENDING instance row.
+    Runs on the spawn worker pool; the outcome is written back to the row.
+    """
+    with app.app_context():
+        try:
+            _do_provision_instance(instance_id)
+        except Exception:
+            current_app.logger.exception("Unexpected error while provisioning %s", instance_id)
+        finally:
+            db.session.remove()
+            with _provisioning_lock:
+                done = _provisioning.pop(instance_id, None)
+            if done is not None:
+                done.set()
+
+
+def _do_provision_instance(instance_id):
+    instance = K8sInstance.query.filter_by(id=instance_id).first()
+    if not instance or instance.status != STATUS_PENDING:
+        return
+    config = _get_config_entry(instance.challenge_id).config
+    if not config:
+        instance.status = STATUS_FAILED
+        instance.last_error = "Challenge not configured"
+        db.session.add(instance)
+        db.session.commit()
+        return
+
+    deployment_name = instance.deployment_name
+    service_name = instance.service_name
+    route_name = instance.route_name
+    hostname = instance.hostname
+    labels = _build_labels(
+        instance.challenge_id,
+        instance.user_id,
+        instance.id,
+        instance.owner_scope,
+        instance.team_id,
     )
-    db.session.add(instance)
-    db.session.commit()
 
-    client, client_error = _get_client_safe()
+    client, client_error = _get_client_safe(instance.backend)
     if not client:
         instance.status = STATUS_FAILED
         instance.last_error = client_error
         db.session.add(instance)
         db.session.commit()
-        return (
-            jsonify({"success": False, "message": "Kubernetes client error", "error": client_error}),
-            500,
-        )
+        return
+    gateway_name = _get_gateway_name(instance.backend)
+    gateway_namespace = _get_gateway_namespace(instance.backend)
     try:
-        _ = client.create_deployment(
-            name=deployment_name,
-            image=config.image,
-            container_port=config.container_port,
-            resources=_build_resource_limits(config),
-            labels=labels,
-        )
-        _ = client.create_service(
+        claimed = None
+        if config.warm_pool_size and _on_default_backend(instance):
+            try:
+                claimed = claim_warm_deployment(client, config, labels)
+            except K8sApiError as exc:
+                current_app.logger.warning(
+                    "Warm pool claim failed, creating a fresh deployment: %s", exc
+                )
+        selector_labels = labels
+        if claimed:
+            deployment_name, selector_labels = claimed
+            # Record the claimed name right away so stop/cleanup target it.
+            instance.deployment_name = deployment_name
+            db.session.add(instance)
+            db.session.commit()
+            spawn_pool.submit(
+                _refill_warm_pool, current_app._get_current_object(), config.challenge_id
+            )
+
+        # The Service selects on labels and the route references the Service by
+        # name, so all objects can be created at once.
+        calls = {}
+        if not claimed:
+            calls["deployment"] = lambda: client.apply_deployment(
+                name=deployment_name,
+                image=config.image,
+                container_port=config.container_port,
+                resources=_build_resource_limits(config),
+                labels=labels,
+            )
+        calls["service"] = lambda: client.apply_service(
             name=service_name,
-            selector_labels=labels,
+            selector_labels=selector_labels,
             port=config.container_port,
             target_port=config.container_port,
             labels=labels,
         )
+        if hostname:
+            calls["route"] = lambda: client.apply_http_route(
+                name=route_name,
+                hostname=hostname,
+                service_name=service_name,
+                service_port=config.container_port,
+                labels=labels,
+                gateway_name=gateway_name,
+                gateway_namespace=gateway_namespace,
+            )
+        outcomes = dict(zip(calls, fan_out(*calls.values())))
+        _raise_fan_out_errors(
+            [outcomes[key] for key in ("deployment", "service") if key in outcomes]
+        )
         route_created = False
         if hostname:
-            try:
-                _ = client.create_http_route(
-                    name=route_name,
-                    hostname=hostname,
-                    service_name=service_name,
-                    service_port=config.container_port,
-                    labels=labels,
-                    gateway_name=_get_gateway_name(),
-                    gateway_namespace=_get_gateway_namespace(),
-                )
+            route_error = outcomes["route"][1]
+            if route_error is None:
                 route_created = True
-            except K8sApiError as exc:
+            elif isinstance(route_error, K8sApiError):
                 current_app.logger.warning(
-                    "HTTPRoute creation failed, falling back to cluster IP: %s", exc
+                    "HTTPRoute creation failed, falling back to cluster IP: %s", route_error
                 )
                 hostname = None
-        status_info = client.get_deployment_status(deployment_name)
-        instance.status = STATUS_READY if status_info.get("ready") else STATUS_PENDING
+            else:
+                raise route_error
+        # The apply response already carries the Deployment's status.
+        current = None if claimed else outcomes["deployment"][0][1]
+        # Waiting here holds a spawn worker through the image pull; by default the
+        # row stays PENDING and ?wait=, the informer or status refreshes promote it.
+        ready_wait = float(current_app.config.get("PODSPAWNER_PROVISION_READY_WAIT", 0))
+        try:
+            if ready_wait > 0:
+                status_info = client.wait_for_deployment_ready(deployment_name, ready_wait, current)
+            elif current is not None:
+                status_info = parse_deployment_status(current)
+            else:
+                status_info = client.get_deployment_status(deployment_name)
+        except K8sApiError as exc:
+            # The objects exist; status refreshes pick up readiness later.
+            current_app.logger.warning("Readiness check for %s failed: %s", deployment_name, exc)
+            status_info = {"ready": False}
+
+        # The player may have stopped the instance while we were provisioning.
+        db.session.refresh(instance)
+        if instance.status != STATUS_PENDING:
+            try:
+                _delete_instance_resources(
+                    client, service_name, deployment_name, route_name if route_created else None
+                )
+            except Exception as exc:
+                # The row is already final; the reconciler removes the leftovers.
+                current_app.logger.warning(
+                    "Teardown of stopped instance %s failed: %s", instance.id, exc
+                )
+            return
+
+        if status_info.get("ready"):
+            instance.status = STATUS_READY
+            observe_ready(instance.created_at, _now())
         if hostname and route_created:
             instance.endpoint = _build_public_endpoint(hostname, config.protocol)
             instance.hostname = hostname
@@ -354,40 +1077,193 @@ def spawn_instance(challenge_id):
             instance.route_name = None
             instance.hostname = None
             instance.endpoint = _build_endpoint(
-                service_name, _get_namespace(), config.container_port, config.protocol
+                service_name, instance.k8s_namespace, config.container_port, config.protocol
             )
         db.session.add(instance)
         db.session.commit()
-    except (K8sApiError, SQLAlchemyError) as exc:
+    except (K8sApiError, SQLAlchemyError, OSError, http.client.HTTPException) as exc:
         current_app.logger.exception("Failed to spawn challenge instance")
-        instance.status = STATUS_FAILED
-        instance.last_error = str(exc)
-        db.session.add(instance)
+        db.session.rollback()
+        # Only a row still being provisioned fails; a stopped one stays stopped.
+        K8sInstance.query.filter_by(id=instance_id, status=STATUS_PENDING).update(
+            {K8sInstance.status: STATUS_FAILED, K8sInstance.last_error: str(exc)},
+            synchronize_session=False,
+        )
         db.session.commit()
+        admission.invalidate()
+        if is_transient(exc):
+            # Don't add deletes to an API server that is already struggling;
+            # the reconciler removes whatever was created once it recovers.
+            return
         try:
-            client.delete_service(service_name)
-            client.delete_deployment(deployment_name)
-            if route_name:
-                try:
-                    client.delete_http_route(route_name)
-                except Exception:
-                    pass
+            _delete_instance_resources(client, service_name, deployment_name, route_name)
         except Exception:
             pass
-        return jsonify({"success": False, "message": "Kubernetes error", "error": str(exc)}), 500
 
-    return jsonify({"success": True, "instance": _serialize_instance(instance)})
+
+def reconcile_warm_pool_configs(challenge_id=None):
+    client, client_error = _get_client_safe()
+    if not client:
+        current_app.logger.error("Warm pool reconcile skipped: %s", client_error)
+        return None
+    query = K8sChallengeConfig.query
+    if challenge_id is not None:
+        query = query.filter_by(challenge_id=challenge_id)
+    configs = {}
+    for config in query.all():
+        ok, _ = _validate_config(config)
+        configs[config.challenge_id] = (config, config.warm_pool_size if ok else 0)
+    return reconcile_warm_pools(
+        client, configs, _build_resource_limits, challenge_id=challenge_id
+    )
+
+
+def _refill_warm_pool(app, challenge_id):
+    with app.app_context():
+        try:
+            reconcile_warm_pool_configs(challenge_id)
+        except Exception as exc:
+            current_app.logger.warning("Warm pool refill failed: %s", exc)
+        finally:
+            db.session.remove()
+
+
+@pod_bp.route("/spawn/<int:challenge_id>", methods=["POST"])
+@authed_only
+def spawn_instance(challenge_id):
+    user = get_current_user()
+    entry = _get_config_entry(challenge_id)
+    if not entry.challenge_exists:
+        return jsonify({"success": False, "message": "Challenge not found"}), 404
+
+    owner = _resolve_owner(entry.config, user)
+    if owner is None:
+        return _no_team_response()
+
+    config = entry.config
+    if not config:
+        return jsonify({"success": False, "message": "Challenge not configured"}), 400
+
+    if not entry.ok:
+        return jsonify({"success": False, "message": entry.error}), 400
+
+    # One lookup serves both the active-instance check and the rate limit.
+    latest = _get_latest_instance(challenge_id, owner)
+    active = _active_or_none(latest)
+    if active:
+        # "Déployer" on a suspended instance brings it back instead of a new one.
+        client_error = _wake_instance(active) if active.status == STATUS_SUSPENDED else None
+        if client_error:
+            return (
+                jsonify({"success": False, "message": "Kubernetes client error", "error": client_error}),
+                500,
+            )
+        _touch_instances([active])
+        wait = _requested_wait()
+        if wait and active.status == STATUS_PENDING:
+            _wait_for_instance(active, wait)
+        return jsonify({"success": True, "instance": _serialize_instance(active)})
+
+    # Checked after the active instance: a teammate clicking "Déployer" right
+    # after someone else's spawn gets the shared instance, not a 429.
+    if _is_rate_limited(latest):
+        return jsonify({"success": False, "message": "Too many requests"}), 429
+
+    busy = _busy_backends()
+    if busy and all(b.name in busy for b in placement.backends.values() if b.enabled):
+        return _cluster_busy_response(min(busy.values()))
+
+    _sync_admission()
+    team_id = getattr(user, "team_id", None)
+    cost = _instance_cost(config)
+    rejected = admission.try_admit(challenge_id, user.id, team_id, cost, config.max_instances)
+    if rejected:
+        status_code, message = rejected
+        response = jsonify({"success": False, "message": message})
+        if status_code == 503:
+            response.headers["Retry-After"] = str(
+                current_app.config.get("PODSPAWNER_ADMISSION_RETRY_AFTER", 30)
+            )
+        return response, status_code
+    backend = placement.choose(cost, exclude=busy)
+    if backend is None:
+        admission.release(challenge_id, user.id, team_id, cost)
+        response = jsonify({"success": False, "message": "No cluster has room left, retry later"})
+        response.headers["Retry-After"] = str(
+            current_app.config.get("PODSPAWNER_ADMISSION_RETRY_AFTER", 30)
+        )
+        return response, 503
+
+    instance_id = str(uuid.uuid4())
+    deployment_name = _build_resource_name("deploy", challenge_id, owner, instance_id)
+    service_name = _build_resource_name("svc", challenge_id, owner, instance_id)
+    route_name = _build_resource_name("route", challenge_id, owner, instance_id)
+    expires_at = _now() + timedelta(seconds=config.ttl_seconds)
+    base_domain = _get_base_domain(backend)
+    hostname = f"{service_name}.{base_domain}" if base_domain else None
+
+    instance = K8sInstance(
+        id=instance_id,
+        challenge_id=challenge_id,
+        user_id=user.id,
+        team_id=owner.team_id,
+        owner_scope=owner.scope,
+        k8s_namespace=_get_namespace(backend),
+        backend=backend,
+        deployment_name=deployment_name,
+        service_name=service_name,
+        route_name=route_name,
+        hostname=hostname,
+        created_at=_now(),
+        expires_at=expires_at,
+        status=STATUS_PENDING,
+    )
+    db.session.add(instance)
+    db.session.commit()
+    expiry_scheduler.schedule(instance_id, expires_at)
+
+    app = current_app._get_current_object()
+    with _provisioning_lock:
+        _provisioning[instance_id] = threading.Event()
+    if not spawn_pool.submit(_provision_instance, app, instance_id):
+        with _provisioning_lock:
+            _provisioning.pop(instance_id, None)
+        admission.release(challenge_id, user.id, team_id, cost)
+        placement.release(backend, cost)
+        instance.status = STATUS_FAILED
+        instance.last_error = "Spawn queue full"
+        db.session.add(instance)
+        db.session.commit()
+        return (
+            jsonify({"success": False, "message": "Too many spawns in progress, retry shortly"}),
+            503,
+        )
+
+    wait = _requested_wait()
+    if wait:
+        _wait_for_instance(instance, wait)
+        if instance.status != STATUS_PENDING:
+            return jsonify({"success": True, "instance": _serialize_instance(instance)})
+    return jsonify({"success": True, "instance": _serialize_instance(instance)}), 202
 
 
 @pod_bp.route("/stop/<int:challenge_id>", methods=["POST"])
 @authed_only
 def stop_instance(challenge_id):
     user = get_current_user()
-    inst = _get_active_instance(challenge_id, user.id)
+    owner = _current_owner(challenge_id, user)
+    if owner is None:
+        return _no_team_response()
+    if owner.scope == OWNERSHIP_GLOBAL and not is_admin():
+        return (
+            jsonify({"success": False, "message": "Shared instances can only be stopped by admins"}),
+            403,
+        )
+    inst = _get_active_instance(challenge_id, owner)
     if not inst:
         return jsonify({"success": False, "message": "No active instance"}), 404
 
-    client, client_error = _get_client_safe()
+    client, client_error = _get_client_safe(inst.backend)
     if not client:
         inst.last_error = client_error
         db.session.add(inst)
@@ -397,50 +1273,469 @@ def stop_instance(challenge_id):
             500,
         )
     try:
-        client.delete_service(inst.service_name)
-        client.delete_deployment(inst.deployment_name)
-        if inst.route_name:
-            try:
-                client.delete_http_route(inst.route_name)
-            except Exception:
-                pass
+        _delete_instance_resources(
+            client, inst.service_name, inst.deployment_name, inst.route_name
+        )
+    except ClusterBusyError as exc:
+        # Nothing was sent; keep the instance active so the player can retry.
+        return _cluster_busy_response(exc.retry_after)
     except K8sApiError as exc:
+        if is_transient(exc):
+            # Some objects may still be running; stopping again finishes the job.
+            return _cluster_busy_response(max(1, client.breaker.retry_after()))
         inst.last_error = str(exc)
+    was_counted = inst.status in {STATUS_PENDING, STATUS_READY, STATUS_SUSPENDED}
     inst.status = STATUS_STOPPED
     inst.expires_at = _now()
     db.session.add(inst)
     db.session.commit()
+    expiry_scheduler.cancel(inst.id)
+    if was_counted:
+        config = _get_config_entry(challenge_id).config
+        cost = _instance_cost(config) if config else (0, 0)
+        placement.release(inst.backend, cost)
+        if inst.user_id != user.id:
+            # Stopped on a teammate's behalf: resync rather than guess their counters.
+            admission.invalidate()
+        else:
+            admission.release(challenge_id, user.id, getattr(user, "team_id", None), cost)
     return jsonify({"success": True, "instance": _serialize_instance(inst)})
 
 
+def _idle_settings():
+    config = current_app.config
+    return (
+        int(config.get("PODSPAWNER_IDLE_SECONDS", 900)),
+        # last_seen_at is only written when older than this, not on every poll.
+        int(config.get("PODSPAWNER_IDLE_TOUCH_INTERVAL", 60)),
+    )
+
+
+def _touch_instances(instances):
+    """
+    Record that the owner is looking at these instances.
+    """
+    now = _now()
+    touch_interval = _idle_settings()[1]
+    stale = [
+        inst
+        for inst in instances
+        if inst.status in {STATUS_PENDING, STATUS_READY, STATUS_SUSPENDED}
+        and (
+            inst.last_seen_at is None
+            or (now - inst.last_seen_at).total_seconds() >= touch_interval
+        )
+    ]
+    if not stale:
+        return
+    K8sInstance.query.filter(K8sInstance.id.in_([inst.id for inst in stale])).update(
+        {K8sInstance.last_seen_at: now}, synchronize_session=False
+    )
+    db.session.commit()
+    for inst in stale:
+        inst.last_seen_at = now
+
+
+def _wake_instance(inst):
+    """
+    Scale a suspended instance back to one replica; it is PENDING until ready.
+    Returns a client error message when no Kubernetes client is available.
+    """
+    client, client_error = _get_client_safe(inst.backend)
+    if not client:
+        return client_error
+    try:
+        client.scale_deployment(inst.deployment_name, 1)
+    except K8sApiError as exc:
+        if is_transient(exc):
+            # Stay suspended; the next visit retries the wake-up.
+            return None
+        inst.status = STATUS_FAILED
+        inst.last_error = str(exc)
+        db.session.add(inst)
+        db.session.commit()
+        return None
+    inst.status = STATUS_PENDING
+    inst.last_seen_at = inst.woken_at = _now()
+    db.session.add(inst)
+    db.session.commit()
+    return None
+
+
+def _record_status(inst, status_info):
+    new_status = STATUS_READY if status_info.get("ready") else STATUS_PENDING
+    if inst.status != new_status:
+        if new_status == STATUS_READY and inst.status == STATUS_PENDING and not inst.woken_at:
+            observe_ready(inst.created_at, _now())
+        inst.status = new_status
+        db.session.add(inst)
+        db.session.commit()
+
+
+def _reload(inst):
+    # End the current transaction first: under REPEATABLE READ a refresh inside
+    # it would not see rows committed by the provisioning worker.
+    db.session.commit()
+    db.session.refresh(inst)
+
+
+def _requested_wait():
+    """
+    Seconds from the optional ?wait= parameter, capped by PODSPAWNER_MAX_WAIT.
+    """
+    try:
+        wait = float(request.args.get("wait") or 0)
+    except ValueError:
+        return 0
+    return max(0.0, min(wait, float(current_app.config.get("PODSPAWNER_MAX_WAIT", 20))))
+
+
+def _wait_for_instance(inst, seconds):
+    """
+    Block up to ``seconds`` for a PENDING instance to become READY: first on a
+    provisioning job running in this process, then on the Deployment itself
+    through the informer or a single-object watch.
+    """
+    deadline = time.monotonic() + seconds
+    with _provisioning_lock:
+        provisioning = _provisioning.get(inst.id)
+    if provisioning is not None:
+        finished = provisioning.wait(seconds)
+        _reload(inst)
+        if not finished:
+            return
+    remaining = deadline - time.monotonic()
+    if inst.status != STATUS_PENDING or remaining <= 0:
+        return
+    status_info = None
+    if _on_default_backend(inst):
+        status_info = deployment_informer.wait_ready(inst.deployment_name, remaining)
+    if status_info is None:
+        client, _ = _get_client_safe(inst.backend)
+        if not client:
+            return
+        try:
+            status_info = client.wait_for_deployment_ready(inst.deployment_name, remaining)
+        except K8sApiError as exc:
+            current_app.logger.warning("Waiting for %s failed: %s", inst.deployment_name, exc)
+            return
+    # Another request may have stopped it meanwhile.
+    _reload(inst)
+    if inst.status == STATUS_PENDING and status_info.get("exists", True):
+        _record_status(inst, status_info)
+
+
+# Instance id -> monotonic time of its last status lookup on the API server.
+_status_checked_lock = threading.Lock()
+_status_checked = {}
+
+
+def _api_check_due(inst):
+    """
+    Whether a status refresh without the informer should ask the API server.
+    READY instances rarely change, so they are only rechecked every
+    PODSPAWNER_STATUS_RECHECK_SECONDS; the reconciler catches drift meanwhile.
+    """
+    if inst.status != STATUS_READY:
+        return True
+    interval = float(current_app.config.get("PODSPAWNER_STATUS_RECHECK_SECONDS", 10))
+    with _status_checked_lock:
+        checked_at = _status_checked.get(inst.id)
+    return checked_at is None or time.monotonic() - checked_at >= interval
+
+
+def _mark_api_checked(instances):
+    now = time.monotonic()
+    with _status_checked_lock:
+        if len(_status_checked) > 10000:
+            _status_checked.clear()
+        for inst in instances:
+            _status_checked[inst.id] = now
+
+
+def _conditional_json(payload):
+    """
+    JSON response with a strong ETag over its body; a request whose
+    If-None-Match matches gets an empty 304 instead.
+    """
+    response = jsonify(payload)
+    response.set_etag(hashlib.sha1(response.get_data()).hexdigest())
+    # Browsers revalidate on every poll and reuse the cached body on 304.
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response.make_conditional(request)
+
+
+def _refresh_instance_status(inst):
+    """
+    Sync an active instance's status with the cluster.
+    Returns a client error message when no Kubernetes client is available.
+    """
+    if inst.status in {STATUS_STOPPED, STATUS_EXPIRED, STATUS_FAILED, STATUS_SUSPENDED}:
+        return None
+    try:
+        status_info = _cached_status(inst)
+        if status_info is None:
+            if not _api_check_due(inst):
+                return None
+            client, client_error = _get_client_safe(inst.backend)
+            if not client:
+                return client_error
+            status_info = client.get_deployment_status(inst.deployment_name)
+            _mark_api_checked([inst])
+        _record_status(inst, status_info)
+    except K8sApiError as exc:
+        if is_transient(exc):
+            # Throttled or API server trouble: keep the last known status.
+            return None
+        inst.status = STATUS_FAILED
+        inst.last_error = str(exc)
+        db.session.add(inst)
+        db.session.commit()
+    return None
+
+
+def _refresh_instance_statuses(instances):
+    """
+    Batched _refresh_instance_status: the informer is consulted first and the
+    rest is resolved with one labelled LIST.
+    """
+    active = [
+        inst
+        for inst in instances
+        if inst.status not in {STATUS_STOPPED, STATUS_EXPIRED, STATUS_FAILED, STATUS_SUSPENDED}
+    ]
+    statuses = {}
+    missing = []
+    for inst in active:
+        status_info = _cached_status(inst)
+        if status_info is not None:
+            statuses[inst.id] = status_info
+        elif _api_check_due(inst):
+            missing.append(inst)
+    for backend, group in _group_by_backend(missing).items():
+        client, client_error = _get_client_safe(backend)
+        if not client:
+            return client_error
+        try:
+            ids = ",".join(inst.id for inst in group)
+            items, _ = client.list_deployments(f"ctf.managed=true,ctf.instance_id in ({ids})")
+        except K8sApiError as exc:
+            current_app.logger.warning("Batched status lookup on %s failed: %s", backend, exc)
+            continue
+        _mark_api_checked(group)
+        listed = {
+            (obj.get("metadata") or {}).get("name"): parse_deployment_status(obj)
+            for obj in items
+        }
+        for inst in group:
+            statuses[inst.id] = listed.get(inst.deployment_name, {"ready": False})
+
+    changed = False
+    for inst in active:
+        if inst.id not in statuses:
+            continue
+        new_status = STATUS_READY if statuses[inst.id].get("ready") else STATUS_PENDING
+        if inst.status != new_status:
+            if new_status == STATUS_READY and inst.status == STATUS_PENDING and not inst.woken_at:
+                observe_ready(inst.created_at, _now())
+            inst.status = new_status
+            db.session.add(inst)
+            changed = True
+    if changed:
+        db.session.commit()
+    return None
+
+
+def _parse_challenge_ids(raw):
+    if not raw:
+        return None
+    try:
+        return sorted({int(part) for part in raw.split(",") if part.strip()})
+    except ValueError:
+        return []
+
+
+@pod_bp.route("/status", methods=["GET"])
+@authed_only
+def instances_status():
+    """
+    Status of the caller's latest instance for several challenges at once.
+    ``?ids=1,2,3`` restricts the lookup; without it every challenge is returned.
+    """
+    user = get_current_user()
+    challenge_ids = _parse_challenge_ids(request.args.get("ids"))
+    limit = int(current_app.config.get("PODSPAWNER_STATUS_BATCH_LIMIT", 100))
+    if challenge_ids == [] or (challenge_ids and len(challenge_ids) > limit):
+        return jsonify({"success": False, "message": "Invalid challenge id list"}), 400
+
+    if challenge_ids is None:
+        challenge_ids = [
+            row.challenge_id for row in db.session.query(K8sChallengeConfig.challenge_id)
+        ]
+        listed = None
+    else:
+        listed = challenge_ids
+    owners = {}
+    for challenge_id in challenge_ids:
+        owner = _current_owner(challenge_id, user)
+        if owner is not None:
+            owners[challenge_id] = owner
+    instances = _get_latest_instances(owners)
+    _touch_instances(list(instances.values()))
+    client_error = _refresh_instance_statuses(list(instances.values()))
+    if client_error:
+        return (
+            jsonify({"success": False, "message": "Kubernetes client error", "error": client_error}),
+            500,
+        )
+    result = {str(cid): None for cid in listed or []}
+    for cid, inst in instances.items():
+        result[str(cid)] = _serialize_instance(inst)
+    return _conditional_json({"success": True, "instances": result})
+
+
 @pod_bp.route("/status/<int:challenge_id>", methods=["GET"])
 @authed_only
 def instance_status(challenge_id):
+    """
+    Status of the caller's latest instance for a challenge. The response has
+    an ETag, so an unchanged instance costs the poller a bodiless 304.
+    """
     user = get_current_user()
-    inst = _get_latest_instance(challenge_id, user.id)
+    owner = _current_owner(challenge_id, user)
+    if owner is None:
+        return _no_team_response()
+    inst = _get_latest_instance(challenge_id, owner)
     if not inst:
         return jsonify({"success": False, "message": "No instance"}), 404
 
-    if inst.status not in {STATUS_STOPPED, STATUS_EXPIRED, STATUS_FAILED}:
-        try:
-            client, client_error = _get_client_safe()
-            if not client:
-                return (
-                    jsonify(
-                        {"success": False, "message": "Kubernetes client error", "error": client_error}
-                    ),
-                    500,
-                )
-            status_info = client.get_deployment_status(inst.deployment_name)
-            inst.status = STATUS_READY if status_info.get("ready") else STATUS_PENDING
-            db.session.add(inst)
-            db.session.commit()
-        except K8sApiError as exc:
-            inst.status = STATUS_FAILED
-            inst.last_error = str(exc)
-            db.session.add(inst)
-            db.session.commit()
-    return jsonify({"success": True, "instance": _serialize_instance(inst)})
+    # Opening the challenge again is what counts as the player coming back.
+    client_error = _wake_instance(inst) if inst.status == STATUS_SUSPENDED else None
+    if client_error:
+        return (
+            jsonify({"success": False, "message": "Kubernetes client error", "error": client_error}),
+            500,
+        )
+    _touch_instances([inst])
+    wait = _requested_wait()
+    if wait and inst.status == STATUS_PENDING:
+        # Waiting already consulted the cluster; no separate refresh needed.
+        _wait_for_instance(inst, wait)
+        client_error = None
+    else:
+        client_error = _refresh_instance_status(inst)
+    if client_error:
+        return (
+            jsonify({"success": False, "message": "Kubernetes client error", "error": client_error}),
+            500,
+        )
+    return _conditional_json({"success": True, "instance": _serialize_instance(inst)})
+
+
+def _events_settings():
+    config = current_app.config
+    return (
+        # Polling interval for instances the informer doesn't cover.
+        float(config.get("PODSPAWNER_EVENTS_CHECK_INTERVAL", 4)),
+        float(config.get("PODSPAWNER_EVENTS_HEARTBEAT", 15)),
+        float(config.get("PODSPAWNER_EVENTS_MAX_SECONDS", 120)),
+        # Row re-read without a Deployment change (expiry extended, stopped elsewhere).
+        float(config.get("PODSPAWNER_EVENTS_RESYNC_SECONDS", 30)),
+    )
+
+
+@pod_bp.route("/events/<int:challenge_id>", methods=["GET"])
+@authed_only
+def instance_events(challenge_id):
+    """
+    Server-Sent Events stream of the caller's instance for a challenge.
+    A message is only sent when status, endpoint or expiry change; the stream
+    is closed after PODSPAWNER_EVENTS_MAX_SECONDS and the browser reconnects.
+    The row is re-read when the informer reports a change to the instance's
+    Deployment, when its provisioning job ends, or every
+    PODSPAWNER_EVENTS_RESYNC_SECONDS.
+    """
+    owner = _current_owner(challenge_id, get_current_user())
+    if owner is None:
+        return _no_team_response()
+    check_interval, heartbeat, max_seconds, resync = _events_settings()
+
+    def snapshot():
+        """
+        The payload to send, and what to watch for its next change: plain values,
+        as the row is expired once the read transaction ends.
+        """
+        inst = _get_latest_instance(challenge_id, owner)
+        if not inst:
+            return {"success": False, "message": "No instance"}, None
+        client_error = _wake_instance(inst) if inst.status == STATUS_SUSPENDED else None
+        if not client_error:
+            _touch_instances([inst])
+            client_error = _refresh_instance_status(inst)
+        watch = None
+        if inst.status in {STATUS_PENDING, STATUS_READY, STATUS_SUSPENDED}:
+            watch = (inst.id, inst.deployment_name, _on_default_backend(inst))
+        if client_error:
+            return (
+                {"success": False, "message": "Kubernetes client error", "error": client_error},
+                watch,
+            )
+        return {"success": True, "instance": _serialize_instance(inst)}, watch
+
+    def wait_for_change(watch, since, timeout):
+        """
+        Block up to ``timeout`` seconds for something that changes the snapshot.
+        Returns (changed, informer status to compare the next wait against).
+        """
+        if watch is not None:
+            instance_id, deployment_name, on_default = watch
+            with _provisioning_lock:
+                provisioning = _provisioning.get(instance_id)
+            if provisioning is not None:
+                return provisioning.wait(timeout), since
+            if on_default:
+                status = deployment_informer.wait_change(deployment_name, since, timeout)
+                if status is not None:
+                    return status != since, status
+        # No active instance (a spawn would be missed), no informer for this
+        # backend, or it is out of sync: poll the row.
+        wait = min(timeout, check_interval)
+        time.sleep(wait)
+        return wait >= check_interval, None
+
+    def generate():
+        started = time.monotonic()
+        deadline = started + max_seconds
+        last_sent = started
+        last_payload = None
+        since = None
+        yield f"retry: {int(check_interval * 1000)}\n\n"
+        while time.monotonic() < deadline:
+            payload, watch = snapshot()
+            payload = json.dumps(payload, sort_keys=True)
+            # End the read transaction so the next read sees fresh rows.
+            db.session.rollback()
+            if payload != last_payload:
+                last_payload = payload
+                last_sent = time.monotonic()
+                yield f"data: {payload}\n\n"
+            if since is None and watch is not None and watch[2]:
+                since = deployment_informer.get(watch[1])
+            resync_at = min(time.monotonic() + resync, deadline)
+            while time.monotonic() < resync_at:
+                timeout = min(resync_at, last_sent + heartbeat) - time.monotonic()
+                changed, since = wait_for_change(watch, since, max(timeout, 0.0))
+                if changed:
+                    break
+                if time.monotonic() - last_sent >= heartbeat:
+                    last_sent = time.monotonic()
+                    yield ": keep-alive\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @admin_bp.route("/cron/cleanup", methods=["POST"])
@@ -450,45 +1745,512 @@ def cleanup_route():
     return jsonify({"success": True, "cleaned": cleaned})
 
 
+@admin_bp.route("/cron/reconcile", methods=["POST"])
+@admins_only
+def reconcile_route():
+    report = reconcile_cluster_state()
+    if report is None:
+        return jsonify({"success": False, "message": "Kubernetes client error"}), 500
+    return jsonify({"success": True, "report": report})
+
+
+@admin_bp.route("/metrics", methods=["GET"])
+@admins_only
+def metrics_route():
+    """
+    Prometheus text exposition. API and readiness histograms are per process;
+    the instance and backlog gauges are read from the database on each scrape.
+    """
+    now = _now()
+    by_status = (
+        db.session.query(K8sInstance.status, func.count(K8sInstance.id))
+        .group_by(K8sInstance.status)
+        .all()
+    )
+    backlog, oldest = (
+        db.session.query(func.count(K8sInstance.id), func.min(K8sInstance.expires_at))
+        .filter(*_expired_criteria(now))
+        .one()
+    )
+    lines = render_registry()
+    lines += render_gauge(
+        "podspawner_instances",
+        "Instances by status.",
+        sorted(((status,), count) for status, count in by_status),
+        ("status",),
+    )
+    lines += render_gauge(
+        "podspawner_cleanup_backlog",
+        "Expired instances not yet torn down by cleanup_expired_instances.",
+        [((), backlog)],
+    )
+    lines += render_gauge(
+        "podspawner_cleanup_lag_seconds",
+        "Age of the oldest expired instance still waiting for cleanup.",
+        [((), (now - oldest).total_seconds() if oldest else 0.0)],
+    )
+    lines += render_gauge(
+        "podspawner_spawn_queue_pending",
+        "Spawns queued or running on this process's worker pool.",
+        [((), spawn_pool.pending())],
+    )
+    with _client_lock:
+        clients = sorted((name, client) for name, (_, client) in _shared_clients.items())
+    lines += render_gauge(
+        "podspawner_k8s_circuit_open",
+        "1 while the Kubernetes API circuit breaker of a backend is failing calls fast.",
+        [((name,), int(client.breaker.is_open())) for name, client in clients],
+        ("backend",),
+    )
+    lines += render_gauge(
+        "podspawner_backend_active_instances",
+        "Active instances per backend as seen by this process's placement counters.",
+        sorted(((name,), usage["active_instances"]) for name, usage in placement.snapshot().items()),
+        ("backend",),
+    )
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+
+def _merge_reports(total, report):
+    for key, value in report.items():
+        if isinstance(value, dict):
+            _merge_reports(total.setdefault(key, {}), value)
+        else:
+            total[key] = total.get(key, 0) + value
+    return total
+
+
+def _backends_by_namespace():
+    """
+    Backend names grouped by the (API server, namespace) they point at.
+    Backends that only differ in routing share their managed objects.
+    """
+    groups = {}
+    for name in placement.backends:
+        settings = _client_settings(name)
+        groups.setdefault((settings["host"], settings["namespace"]), []).append(name)
+    return list(groups.values())
+
+
+def reconcile_cluster_state():
+    """
+    Reconcile every namespace used by a backend; returns the summed report, or
+    None when nothing could be reconciled.
+    """
+    report = None
+    for names in _backends_by_namespace():
+        # Each pass sees every managed object in the namespace, so it must know
+        # the rows of all the backends placing objects there.
+        backend = ", ".join(names)
+        client, client_error = _get_client_safe(names[0])
+        if not client:
+            current_app.logger.error("Reconcile of %s skipped: %s", backend, client_error)
+            continue
+        try:
+            backend_report = reconcile_instances(
+                client,
+                grace_seconds=int(current_app.config.get("PODSPAWNER_RECONCILE_GRACE_SECONDS", 300)),
+                batch_size=int(current_app.config.get("PODSPAWNER_CLEANUP_MAX_BATCH", 200)),
+                backends=names,
+            )
+        except (K8sApiError, OSError) as exc:
+            db.session.rollback()
+            current_app.logger.error("Reconcile of %s failed: %s", backend, exc)
+            continue
+        current_app.logger.info("Reconcile of %s finished: %s", backend, backend_report)
+        report = _merge_reports(report or {}, backend_report)
+    admission.invalidate()
+    try:
+        sync_prepull_images()
+    except (K8sApiError, OSError) as exc:
+        current_app.logger.warning("Pre-pull DaemonSet update failed: %s", exc)
+    return report
+
+
+_cleanup_batch_size = None
+
+
+def _cleanup_settings():
+    config = current_app.config
+    return (
+        int(config.get("PODSPAWNER_CLEANUP_MIN_BATCH", 20)),
+        # Bounded by the label selector length: ~40 bytes per instance id.
+        int(config.get("PODSPAWNER_CLEANUP_MAX_BATCH", 200)),
+        float(config.get("PODSPAWNER_CLEANUP_BATCH_TARGET_SECONDS", 2)),
+        float(config.get("PODSPAWNER_CLEANUP_TIME_BUDGET", 30)),
+    )
+
+
+def _delete_instances_bulk(client, rows):
+    """
+    Delete the objects of many instances with one deletecollection per kind.
+    Kinds whose API rejects deletecollection (405) fall back to per-name deletes.
+    """
+    ids = [row.id for row in rows]
+    selector = f"ctf.instance_id in ({','.join(ids)})"
+    outcomes = fan_out(
+        lambda: client.delete_deployments(selector),
+        lambda: client.delete_services(selector),
+        lambda: client.delete_http_routes(selector),
+    )
+    fallbacks = (
+        lambda row: client.delete_deployment(row.deployment_name),
+        lambda row: client.delete_service(row.service_name),
+        lambda row: client.delete_http_route(row.route_name) if row.route_name else None,
+    )
+    for idx, (_, exc) in enumerate(outcomes):
+        if isinstance(exc, K8sApiError) and exc.status == 405:
+            delete_one = fallbacks[idx]
+            outcomes[idx] = (None, None)
+            for result in fan_out(*[lambda row=row: delete_one(row) for row in rows]):
+                if result[1] is not None:
+                    outcomes[idx] = result
+                    break
+    # Route deletion stays best-effort.
+    _raise_fan_out_errors(outcomes[:2])
+
+
+def _expired_criteria(now):
+    # Everything cleanup_expired_instances still has to tear down.
+    return (
+        K8sInstance.expires_at <= now,
+        K8sInstance.status.notin_([STATUS_EXPIRED, STATUS_STOPPED]),
+    )
+
+
 def cleanup_expired_instances():
-    client, client_error = _get_client_safe()
-    if not client:
-        current_app.logger.error("Cleanup skipped: %s", client_error)
-        return 0
+    """
+    Tear down expired instances in batches until the backlog is drained or the
+    time budget is spent. The batch size adapts to how fast the API server
+    handles each batch and is remembered between runs.
+    """
+    global _cleanup_batch_size
+    min_batch, max_batch, target_seconds, time_budget = _cleanup_settings()
+    batch_size = _cleanup_batch_size or min_batch
+    started = time.monotonic()
+    cleaned = 0
+    # Backends left alone for the rest of this run; their rows would otherwise
+    # come back first in every batch and starve the healthy backends.
+    skipped = set()
+    while time.monotonic() - started < time_budget:
+        query = db.session.query(
+            K8sInstance.id,
+            K8sInstance.deployment_name,
+            K8sInstance.service_name,
+            K8sInstance.route_name,
+            K8sInstance.backend,
+        ).filter(*_expired_criteria(_now()))
+        if skipped:
+            query = query.filter(backend_exclude(K8sInstance.backend, skipped))
+        rows = query.order_by(K8sInstance.expires_at).limit(batch_size).all()
+        if not rows:
+            break
+        batch_started = time.monotonic()
+        clients = _clients_for(rows, "Cleanup")
+        for backend, group in _group_by_backend(rows).items():
+            if backend not in clients:
+                skipped.add(backend)
+                continue
+            values = {K8sInstance.status: STATUS_EXPIRED}
+            try:
+                _delete_instances_bulk(clients[backend], group)
+            except Exception as exc:
+                if is_transient(exc):
+                    # Leave the rows expired-but-active so the next run retries them.
+                    current_app.logger.warning(
+                        "Cleanup paused on %s, Kubernetes API busy: %s", backend, exc
+                    )
+                    skipped.add(backend)
+                    continue
+                values[K8sInstance.last_error] = str(exc)
+            K8sInstance.query.filter(
+                K8sInstance.id.in_([row.id for row in group]),
+                K8sInstance.status.notin_([STATUS_EXPIRED, STATUS_STOPPED]),
+            ).update(values, synchronize_session=False)
+            db.session.commit()
+            cleaned += len(group)
+
+        drained = len(rows) < batch_size
+        elapsed = time.monotonic() - batch_started
+        if elapsed < target_seconds / 2:
+            batch_size = min(max_batch, batch_size * 2)
+        elif elapsed > target_seconds:
+            batch_size = max(min_batch, batch_size // 2)
+        if drained:
+            break
+    _cleanup_batch_size = batch_size
+    if cleaned:
+        admission.invalidate()
+    return cleaned
+
+
+def _expire_due_instances(instance_ids):
+    """
+    Tear down the instances the expiry scheduler reports as due. Each row is
+    claimed with a conditional UPDATE first so processes racing on the same
+    instance don't both delete it; rows whose expiry moved are rescheduled.
+    """
     now = _now()
-    expired = (
-        K8sInstance.query.filter(
-            K8sInstance.expires_at <= now,
-            K8sInstance.status.notin_([STATUS_EXPIRED, STATUS_STOPPED]),
+    rows = (
+        db.session.query(
+            K8sInstance.id,
+            K8sInstance.deployment_name,
+            K8sInstance.service_name,
+            K8sInstance.route_name,
+            K8sInstance.expires_at,
+            K8sInstance.status,
+            K8sInstance.backend,
         )
-        .limit(50)
+        .filter(K8sInstance.id.in_(instance_ids))
         .all()
     )
-    cleaned = 0
-    for inst in expired:
+    # Instances on an unreachable backend are left to the cleanup sweep.
+    clients = _clients_for(rows, "Expiry")
+    claimed = []
+    for row in rows:
+        if row.status in {STATUS_EXPIRED, STATUS_STOPPED}:
+            continue
+        if (row.backend or DEFAULT_BACKEND) not in clients:
+            continue
+        if row.expires_at > now:
+            expiry_scheduler.schedule(row.id, row.expires_at)
+            continue
+        updated = K8sInstance.query.filter(
+            K8sInstance.id == row.id,
+            K8sInstance.expires_at <= now,
+            K8sInstance.status.notin_([STATUS_EXPIRED, STATUS_STOPPED]),
+        ).update({K8sInstance.status: STATUS_EXPIRED}, synchronize_session=False)
+        if updated:
+            claimed.append(row)
+    db.session.commit()
+    if not claimed:
+        return 0
+    for backend, group in _group_by_backend(claimed).items():
         try:
-            client.delete_service(inst.service_name)
-            client.delete_deployment(inst.deployment_name)
-            if inst.route_name:
-                try:
-                    client.delete_http_route(inst.route_name)
-                except Exception:
-                    pass
+            _delete_instances_bulk(clients[backend], group)
         except Exception as exc:
-            inst.last_error = str(exc)
-        inst.status = STATUS_EXPIRED
-        db.session.add(inst)
-        cleaned += 1
-    if cleaned:
+            # The rows are already inactive, so the reconciler removes leftovers.
+            K8sInstance.query.filter(K8sInstance.id.in_([row.id for row in group])).update(
+                {K8sInstance.last_error: str(exc)}, synchronize_session=False
+            )
+            db.session.commit()
+    admission.invalidate()
+    return len(claimed)
+
+
+def _schedule_upcoming_expiries(horizon_seconds):
+    """
+    Load active instances expiring within ``horizon_seconds`` into the local
+    scheduler, covering instances spawned by other processes.
+    """
+    rows = (
+        db.session.query(K8sInstance.id, K8sInstance.expires_at)
+        .filter(
+            K8sInstance.expires_at <= _now() + timedelta(seconds=horizon_seconds),
+            K8sInstance.status.notin_([STATUS_EXPIRED, STATUS_STOPPED]),
+        )
+        .all()
+    )
+    for row in rows:
+        expiry_scheduler.schedule(row.id, row.expires_at)
+
+
+def _clients_for(rows, action):
+    """
+    Kubernetes clients for the backends of ``rows``; unreachable ones are left out.
+    """
+    clients = {}
+    for backend in _group_by_backend(rows):
+        client, client_error = _get_client_safe(backend)
+        if client:
+            clients[backend] = client
+        else:
+            current_app.logger.error("%s skipped on %s: %s", action, backend, client_error)
+    return clients
+
+
+def suspend_idle_instances():
+    """
+    Scale instances nobody has looked at for PODSPAWNER_IDLE_SECONDS down to
+    zero replicas. Rows are claimed with a conditional UPDATE before the scale,
+    and an instance woken in between is scaled back up.
+    """
+    idle_seconds = _idle_settings()[0]
+    if idle_seconds <= 0:
+        return 0
+    now = _now()
+    idle_since = func.coalesce(K8sInstance.last_seen_at, K8sInstance.created_at)
+    criteria = (
+        K8sInstance.status.in_([STATUS_PENDING, STATUS_READY]),
+        idle_since <= now - timedelta(seconds=idle_seconds),
+        K8sInstance.expires_at > now,
+    )
+    rows = (
+        db.session.query(K8sInstance.id, K8sInstance.deployment_name, K8sInstance.backend)
+        .filter(*criteria)
+        .limit(_cleanup_settings()[1])
+        .all()
+    )
+    clients = _clients_for(rows, "Idle suspension")
+    claimed = [
+        row
+        for row in rows
+        if clients.get(row.backend or DEFAULT_BACKEND)
+        and K8sInstance.query.filter(K8sInstance.id == row.id, *criteria).update(
+            {K8sInstance.status: STATUS_SUSPENDED}, synchronize_session=False
+        )
+    ]
+    db.session.commit()
+    if not claimed:
+        return 0
+    outcomes = fan_out(
+        *[
+            lambda row=row: clients[row.backend or DEFAULT_BACKEND].scale_deployment(
+                row.deployment_name, 0
+            )
+            for row in claimed
+        ]
+    )
+    failed = {row.id for row, (_, exc) in zip(claimed, outcomes) if exc is not None}
+    if failed:
+        # Still running: hand them back to the readiness checks.
+        K8sInstance.query.filter(
+            K8sInstance.id.in_(failed), K8sInstance.status == STATUS_SUSPENDED
+        ).update({K8sInstance.status: STATUS_PENDING}, synchronize_session=False)
         db.session.commit()
-    return cleaned
+    suspended = [row for row in claimed if row.id not in failed]
+    if not suspended:
+        return 0
+    woken = {
+        row.id
+        for row in db.session.query(K8sInstance.id).filter(
+            K8sInstance.id.in_([row.id for row in suspended]),
+            K8sInstance.status != STATUS_SUSPENDED,
+        )
+    }
+    fan_out(
+        *[
+            lambda row=row: clients[row.backend or DEFAULT_BACKEND].scale_deployment(
+                row.deployment_name, 1
+            )
+            for row in suspended
+            if row.id in woken
+        ]
+    )
+    return len(suspended) - len(woken)
+
+
+shutdown_event = threading.Event()
+
+
+def _loop_delay(app, interval):
+    jitter = float(app.config.get("PODSPAWNER_LOOP_JITTER", 0.1))
+    return max(1.0, interval * random.uniform(1 - jitter, 1 + jitter))
+
+
+def _is_leader():
+    """
+    Whether this process should run the cluster-wide background loops.
+    """
+    if not current_app.config.get("PODSPAWNER_LEADER_ELECTION", True):
+        return True
+    client, client_error = _get_client_safe()
+    if not client:
+        return False
+    try:
+        return leader_elector.is_leader(client)
+    except K8sApiError as exc:
+        if exc.status == 403:
+            # Missing RBAC on leases: keep cleaning up rather than stop altogether.
+            current_app.logger.error("Leader election forbidden, running unelected: %s", exc)
+            return True
+        current_app.logger.warning("Leader election failed: %s", exc)
+        return False
+    except OSError as exc:
+        current_app.logger.warning("Leader election failed: %s", exc)
+        return False
+
+
+def stop_background_loops(app):
+    shutdown_event.set()
+    expiry_scheduler.wake()
+    try:
+        with app.app_context():
+            client, _ = _get_client_safe()
+            if client:
+                leader_elector.release(client)
+    except Exception as exc:
+        app.logger.warning("Unable to release leader lease: %s", exc)
 
 
-def schedule_cleanup_loop(app, interval=60):
-    while True:
+def schedule_cleanup_loop(app, interval=600):
+    # Safety net behind the expiry scheduler: sweeps whatever it missed and
+    # hands the next interval's expiries to the leader's scheduler.
+    while not shutdown_event.is_set():
         try:
             with app.app_context():
-                cleanup_expired_instances()
+                if _is_leader():
+                    cleanup_expired_instances()
+                    _schedule_upcoming_expiries(interval * 1.5)
         except Exception as exc:
             app.logger.error("Cleanup loop failed: %s", exc)
-        time.sleep(interval)
+        shutdown_event.wait(_loop_delay(app, interval))
+
+
+def run_expiry_scheduler(app):
+    with app.app_context():
+        max_batch = _cleanup_settings()[1]
+    while not shutdown_event.is_set():
+        due = expiry_scheduler.wait_due(timeout=30, limit=max_batch)
+        if not due:
+            continue
+        try:
+            with app.app_context():
+                _expire_due_instances(due)
+        except Exception as exc:
+            # Missed instances are picked up by the cleanup sweep.
+            app.logger.error("Expiry scheduler failed: %s", exc)
+
+
+def schedule_idle_loop(app, interval=60):
+    while not shutdown_event.is_set():
+        shutdown_event.wait(_loop_delay(app, interval))
+        try:
+            with app.app_context():
+                if _is_leader():
+                    suspend_idle_instances()
+        except Exception as exc:
+            app.logger.error("Idle suspension loop failed: %s", exc)
+
+
+def run_informer(app):
+    deployment_informer.max_staleness = int(
+        app.config.get("PODSPAWNER_INFORMER_MAX_STALENESS", 30)
+    )
+    deployment_informer.run(
+        app,
+        _build_client,
+        watch_timeout=int(app.config.get("PODSPAWNER_INFORMER_WATCH_TIMEOUT", 300)),
+    )
+
+
+def schedule_warm_pool_loop(app, interval=15):
+    while not shutdown_event.is_set():
+        try:
+            with app.app_context():
+                if _is_leader():
+                    reconcile_warm_pool_configs()
+        except Exception as exc:
+            app.logger.error("Warm pool loop failed: %s", exc)
+        shutdown_event.wait(_loop_delay(app, interval))
+
+
+def schedule_reconcile_loop(app, interval=300):
+    while not shutdown_event.is_set():
+        shutdown_event.wait(_loop_delay(app, interval))
+        try:
+            with app.app_context():
+                if _is_leader():
+                    reconcile_cluster_state()
+        except Exception as exc:
+            app.logger.error("Reconcile loop failed: %s", exc)
@@ -0,0 +1,122 @@
+import hashlib
+import uuid
+
+from .k8s_client import K8sApiError, parse_deployment_status
+
+WARM_SELECTOR = "ctf.managed=true,ctf.warm=true"
+
+
+def config_hash(config):
+    """
+    Short fingerprint of the pod-relevant config fields, so warm pods built from
+    an older image or resource spec are never handed out.
+    """
+    parts = [
+        config.image,
+        config.container_port,
+        config.cpu_request,
+        config.cpu_limit,
+        config.mem_request,
+        config.mem_limit,
+        config.protocol,
+    ]
+    return hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:12]
+
+
+def _pod_labels(challenge_id, pool_id):
+    return {
+        "ctf.managed": "true",
+        "ctf.challenge_id": str(challenge_id),
+        "ctf.pool_id": pool_id,
+    }
+
+
+def create_warm_deployment(client, config, resources):
+    pool_id = uuid.uuid4().hex[:12]
+    pod_labels = _pod_labels(config.challenge_id, pool_id)
+    labels = {**pod_labels, "ctf.warm": "true", "ctf.config_hash": config_hash(config)}
+    name = f"deploy-chal{config.challenge_id}-warm-{pool_id}"
+    client.apply_deployment(
+        name=name,
+        image=config.image,
+        container_port=config.container_port,
+        resources=resources,
+        labels=labels,
+        pod_labels=pod_labels,
+    )
+    return name
+
+
+def claim_warm_deployment(client, config, instance_labels):
+    """
+    Take an unclaimed warm Deployment for this challenge, preferring ready ones.
+    Returns (deployment_name, pod_selector) or None when the pool is empty.
+    """
+    selector = (
+        f"{WARM_SELECTOR},ctf.challenge_id={config.challenge_id},"
+        f"ctf.config_hash={config_hash(config)}"
+    )
+    items, _ = client.list_deployments(selector)
+    items.sort(key=lambda obj: not parse_deployment_status(obj)["ready"])
+    for obj in items:
+        metadata = obj.get("metadata") or {}
+        pool_id = (metadata.get("labels") or {}).get("ctf.pool_id")
+        if not pool_id:
+            continue
+        try:
+            # resourceVersion makes the claim fail with 409 if another worker won.
+            client.patch_deployment_labels(
+                metadata["name"],
+                {**instance_labels, "ctf.warm": None},
+                resource_version=metadata.get("resourceVersion"),
+            )
+        except K8sApiError as exc:
+            if exc.status in (404, 409):
+                continue
+            raise
+        return metadata["name"], _pod_labels(config.challenge_id, pool_id)
+    return None
+
+
+def reconcile_warm_pools(client, configs, build_resources, challenge_id=None):
+    """
+    Bring every challenge's unclaimed warm Deployments to its configured size.
+    ``configs`` maps challenge_id to (config, desired_size); warm Deployments of
+    challenges missing from it, or built from an outdated config, are removed.
+    Pass ``challenge_id`` to only look at that challenge's pool.
+    """
+    selector = WARM_SELECTOR
+    if challenge_id is not None:
+        selector = f"{selector},ctf.challenge_id={challenge_id}"
+    items, _ = client.list_deployments(selector)
+    by_challenge = {}
+    for obj in items:
+        labels = (obj.get("metadata") or {}).get("labels") or {}
+        try:
+            chal_id = int(labels.get("ctf.challenge_id"))
+        except (TypeError, ValueError):
+            continue
+        by_challenge.setdefault(chal_id, []).append(obj)
+
+    created = 0
+    deleted = 0
+    for chal_id in set(by_challenge) | set(configs):
+        config, desired = configs.get(chal_id, (None, 0))
+        current_hash = config_hash(config) if config else None
+        keep = []
+        for obj in by_challenge.get(chal_id, []):
+            metadata = obj.get("metadata") or {}
+            if current_hash and (metadata.get("labels") or {}).get("ctf.config_hash") == current_hash:
+                keep.append(obj)
+            else:
+                client.delete_deployment(metadata["name"])
+                deleted += 1
+        # Shrink by dropping the least ready pods first.
+        keep.sort(key=lambda obj: parse_deployment_status(obj)["ready"])
+        while len(keep) > desired:
+            client.delete_deployment(keep.pop(0)["metadata"]["name"])
+            deleted += 1
+        for _ in range(desired - len(keep)):
+            create_warm_deployment(client, config, build_resources(config))
+            created += 1
+    return {"created": created, "deleted": deleted}
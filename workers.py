@@ -0,0 +1,115 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class WorkerPool:
+    """
+    Fixed set of daemon threads draining a bounded job queue.
+    Threads are started on first submit so forked web workers each get their own.
+    """
+
+    def __init__(self, name, workers=4, max_queue=100):
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self._queue = None
+        self._threads = []
+        self._lock = threading.Lock()
+        self._running = 0
+
+    def configure(self, workers=None, max_queue=None):
+        with self._lock:
+            if self._queue is not None:
+                return
+            if workers:
+                self.workers = max(1, int(workers))
+            if max_queue:
+                self.max_queue = max(1, int(max_queue))
+
+    def _start(self):
+        with self._lock:
+            if self._queue is not None:
+                return
+            self._queue = queue.Queue(maxsize=self.max_queue)
+            for idx in range(self.workers):
+                thread = threading.Thread(
+                    target=self._run, name=f"{self.name}-{idx}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queue a job. Returns False when the queue is full.
+        """
+        if self._queue is None:
+            self._start()
+        try:
+            self._queue.put_nowait((fn, args, kwargs))
+        except queue.Full:
+            return False
+        return True
+
+    def pending(self):
+        """
+        Jobs queued or being run by a worker.
+        """
+        if self._queue is None:
+            return 0
+        with self._lock:
+            running = self._running
+        return self._queue.qsize() + running
+
+    def _run(self):
+        while True:
+            fn, args, kwargs = self._queue.get()
+            with self._lock:
+                self._running += 1
+            try:
+                fn(*args, **kwargs)
+            except Exception:
+                # Jobs own their error handling; never let one kill the worker.
+                pass
+            finally:
+                with self._lock:
+                    self._running -= 1
+                self._queue.task_done()
+
+
+spawn_pool = WorkerPool("podspawner-spawn")
+
+
+_fan_out_executor = None
+_fan_out_lock = threading.Lock()
+
+
+def _get_fan_out_executor():
+    global _fan_out_executor
+    with _fan_out_lock:
+        if _fan_out_executor is None:
+            _fan_out_executor = ThreadPoolExecutor(
+                max_workers=16, thread_name_prefix="podspawner-fanout"
+            )
+        return _fan_out_executor
+
+
+def fan_out(*calls):
+    """
+    Run independent zero-argument callables concurrently.
+    Returns a list of (result, exception) pairs in the order of ``calls``;
+    exceptions are collected rather than raised so callers can roll back.
+    """
+    if len(calls) <= 1:
+        futures = None
+    else:
+        executor = _get_fan_out_executor()
+        futures = [executor.submit(call) for call in calls]
+    outcomes = []
+    for idx, call in enumerate(calls):
+        try:
+            result = futures[idx].result() if futures else call()
+            outcomes.append((result, None))
+        except Exception as exc:
+            outcomes.append((None, exc))
+    return outcomes